@@ -7,44 +7,141 @@ from typing import Dict, Any, Optional, List
 
 logger = logging.getLogger(__name__)
 
+# Precompiled pattern - these validators run once per account field during
+# startup validation, so avoid re-compiling (and re.cache lookups) per call.
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Characters allowed in the local part of an email address (besides alphanumerics)
+_EMAIL_LOCAL_EXTRA = frozenset('._%+-')
+
+
+def _parse_port(raw: str, default: int) -> tuple:
+    """Parse a port string once, returning (value, is_valid).
+
+    On invalid input the default is returned as the value so callers can
+    keep going after recording the error.
+    """
+    try:
+        port_num = int(raw)
+    except ValueError:
+        return default, False
+    if 1 <= port_num <= 65535:
+        return port_num, True
+    return default, False
+
+
+# Account schema: required fields, plus (field, config key, fallback) triples
+# applied as defaults from the global config
+_ACCOUNT_REQUIRED = ('imap_username', 'imap_password', 'forward_to')
+_ACCOUNT_DEFAULTS = (
+    ('imap_host', 'imap_host', None),
+    ('imap_port', 'imap_port', 993),
+    ('imap_security', 'imap_security', 'SSL'),
+    ('smtp_host', 'smtp_host', None),
+    ('smtp_port', 'smtp_port', None),
+    ('smtp_username', 'smtp_username', None),
+    ('smtp_password', 'smtp_password', None),
+    ('smtp_security', 'smtp_security', None),
+    ('html_enabled', 'html_enabled', True),
+)
+
+
+def _validate_account(idx: int, account, config: Dict[str, Any], errors: List[str]) -> None:
+    """Validate one ACCOUNTS entry in place, appending problems to errors"""
+    prefix = f"ACCOUNTS[{idx}]"
+
+    if not isinstance(account, dict):
+        errors.append(f"{prefix} must be a JSON object")
+        return
+
+    # Validate required fields - some can come from defaults
+    for field in _ACCOUNT_REQUIRED:
+        if field not in account:
+            errors.append(f"{prefix} missing required '{field}' field")
+
+    # imap_host can come from default but must exist somewhere
+    if 'imap_host' not in account and 'imap_host' not in config:
+        errors.append(f"{prefix} missing 'imap_host' (and no default IMAP_HOST set)")
+
+    # Validate email addresses
+    if 'imap_username' in account and not ConfigValidator.validate_email(account['imap_username']):
+        logger.warning(f"{prefix} 'imap_username' may not be a valid email format")
+
+    if 'forward_to' in account and not ConfigValidator.validate_email(account['forward_to']):
+        errors.append(f"{prefix} 'forward_to' '{account['forward_to']}' is not a valid email")
+
+    # Set defaults - use single account vars (and global SMTP config) when
+    # the account doesn't specify its own
+    account.setdefault('name', f"Account {idx + 1}")
+    for field, config_key, fallback in _ACCOUNT_DEFAULTS:
+        account.setdefault(field, config.get(config_key, fallback))
+
+    # Validate optional phone field
+    phone = account.get('phone')
+    if phone:
+        if not ConfigValidator.validate_phone(phone):
+            errors.append(f"{prefix} 'phone' '{phone}' must be 10 digits")
+        else:
+            account['phone'] = ConfigValidator.format_phone(phone)
+
+    # Validate ports
+    if not ConfigValidator.validate_port(str(account['imap_port'])):
+        errors.append(f"{prefix} 'imap_port' must be valid (1-65535)")
+
+    # Masked forms appear in every log line that mentions the account;
+    # compute them once here instead of on each log call
+    account['masked_username'] = ConfigValidator.mask_email(account.get('imap_username', ''))
+    account['masked_forward_to'] = ConfigValidator.mask_email(account.get('forward_to', ''))
+
+
+def _parse_positive_int(raw: str, default: int) -> tuple:
+    """Parse a positive-integer string once, returning (value, is_valid)."""
+    try:
+        value = int(raw)
+    except ValueError:
+        return default, False
+    if value > 0:
+        return value, True
+    return default, False
+
 
 class ConfigValidator:
     """Validates and provides configuration from environment variables"""
-    
+
     @staticmethod
     def validate_email(email: str) -> bool:
-        """Validate email address format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        """Validate email address format (structural check, no regex)"""
+        local, at, domain = email.rpartition('@')
+        if not at or not local or '.' not in domain:
+            return False
+        host, tld = domain.rsplit('.', 1)
+        if not host or len(tld) < 2 or not tld.isalpha():
+            return False
+        if not all(c.isalnum() or c in '.-' for c in domain):
+            return False
+        return all(c.isalnum() or c in _EMAIL_LOCAL_EXTRA for c in local)
     
     @staticmethod
     def validate_port(port: str) -> bool:
         """Validate port number is in valid range"""
-        try:
-            port_num = int(port)
-            return 1 <= port_num <= 65535
-        except ValueError:
-            return False
-    
+        return _parse_port(port, 0)[1]
+
     @staticmethod
     def validate_positive_int(value: str) -> bool:
         """Validate positive integer"""
-        try:
-            return int(value) > 0
-        except ValueError:
-            return False
+        return _parse_positive_int(value, 0)[1]
     
     @staticmethod
     def validate_phone(phone: str) -> bool:
         """Validate phone number (10 digits)"""
         # Remove any non-digit characters
-        digits_only = re.sub(r'\D', '', phone)
+        digits_only = _NON_DIGIT_RE.sub('', phone)
         return len(digits_only) == 10
     
     @staticmethod
     def format_phone(phone: str) -> str:
         """Format phone number as NNN.NNN.NNNN"""
-        digits_only = re.sub(r'\D', '', phone)
+        digits_only = _NON_DIGIT_RE.sub('', phone)
         if len(digits_only) == 10:
             return f"{digits_only[:3]}.{digits_only[3:6]}.{digits_only[6:]}"
         return phone
@@ -52,19 +149,33 @@ class ConfigValidator:
     @staticmethod
     def mask_email(email: str) -> str:
         """Mask email address for logging"""
-        if not email or '@' not in email:
+        if not email:
+            return email
+        at = email.find('@')
+        if at < 0:
             return email
-        parts = email.split('@')
-        username = parts[0]
-        domain = parts[1]
-        # Show first 2 chars of username and domain
-        masked_user = username[:2] + '*' * (len(username) - 2) if len(username) > 2 else username
-        domain_parts = domain.split('.')
-        if len(domain_parts) > 1:
-            masked_domain = domain_parts[0][:2] + '*' * (len(domain_parts[0]) - 2) + '.' + '.'.join(domain_parts[1:])
+        # Show first 2 chars of username and domain; index math on the
+        # original string avoids the split/join allocations of the old
+        # implementation since this runs on every log line with an email.
+        dot = email.find('.', at)
+        if at > 2:
+            user = email[:2] + '*' * (at - 2)
         else:
-            masked_domain = domain
-        return f"{masked_user}@{masked_domain}"
+            user = email[:at]
+        if dot > at:
+            domain_len = dot - at - 1
+            if domain_len > 2:
+                domain = email[at + 1:at + 3] + '*' * (domain_len - 2) + email[dot:]
+            else:
+                domain = email[at + 1:]
+        else:
+            # No dot (bare hostname): mask the whole tail the same way
+            domain_len = len(email) - at - 1
+            if domain_len > 2:
+                domain = email[at + 1:at + 3] + '*' * (domain_len - 2)
+            else:
+                domain = email[at + 1:]
+        return f"{user}@{domain}"
     
     @staticmethod
     def get_config() -> Dict[str, Any]:
@@ -93,9 +204,9 @@ class ConfigValidator:
         config['imap_password'] = imap_password
         
         imap_port = os.getenv('IMAP_PORT', '993')
-        if not ConfigValidator.validate_port(imap_port):
+        config['imap_port'], valid = _parse_port(imap_port, 993)
+        if not valid:
             errors.append(f"IMAP_PORT '{imap_port}' is not a valid port number (1-65535)")
-        config['imap_port'] = int(imap_port) if ConfigValidator.validate_port(imap_port) else 993
         
         # IMAP connection security
         imap_security = os.getenv('IMAP_SECURITY', 'SSL').upper()
@@ -126,15 +237,19 @@ class ConfigValidator:
         config['smtp_password'] = smtp_password
         
         smtp_port = os.getenv('SMTP_PORT', '587')
-        if not ConfigValidator.validate_port(smtp_port):
+        config['smtp_port'], valid = _parse_port(smtp_port, 587)
+        if not valid:
             errors.append(f"SMTP_PORT '{smtp_port}' is not a valid port number (1-65535)")
-        config['smtp_port'] = int(smtp_port) if ConfigValidator.validate_port(smtp_port) else 587
         
         # SMTP connection security
         smtp_security = os.getenv('SMTP_SECURITY', 'STARTTLS').upper()
         if smtp_security not in ['SSL', 'STARTTLS', 'NONE']:
             errors.append(f"SMTP_SECURITY must be 'SSL', 'STARTTLS', or 'NONE' (got '{smtp_security}')")
         config['smtp_security'] = smtp_security
+
+        # Whether forwards include a styled HTML body (accounts forwarding to
+        # SMS gateways or auto-archivers can turn it off)
+        config['html_enabled'] = os.getenv('HTML_ENABLED', 'true').lower() in ('1', 'true', 'yes')
         
         # Account configuration (accounts_json already fetched above)
         if accounts_json:
@@ -146,56 +261,14 @@ class ConfigValidator:
                 else:
                     validated_accounts = []
                     for idx, account in enumerate(accounts):
-                        if not isinstance(account, dict):
-                            errors.append(f"ACCOUNTS[{idx}] must be a JSON object")
-                            continue
-                        
-                        # Validate required fields - some can come from defaults
-                        required_fields = ['imap_username', 'imap_password', 'forward_to']
-                        for field in required_fields:
-                            if field not in account:
-                                errors.append(f"ACCOUNTS[{idx}] missing required '{field}' field")
-                        
-                        # imap_host can come from default but must exist somewhere
-                        if 'imap_host' not in account and 'imap_host' not in config:
-                            errors.append(f"ACCOUNTS[{idx}] missing 'imap_host' (and no default IMAP_HOST set)")
-                        
-                        # Validate email addresses
-                        if 'imap_username' in account and not ConfigValidator.validate_email(account['imap_username']):
-                            logger.warning(f"ACCOUNTS[{idx}] 'imap_username' may not be a valid email format")
-                        
-                        if 'forward_to' in account and not ConfigValidator.validate_email(account['forward_to']):
-                            errors.append(f"ACCOUNTS[{idx}] 'forward_to' '{account['forward_to']}' is not a valid email")
-                        
-                        # Set defaults - use single account vars as defaults if available
-                        account.setdefault('name', f"Account {idx + 1}")
-                        
-                        # IMAP defaults from single account config if set
-                        account.setdefault('imap_host', config.get('imap_host'))
-                        account.setdefault('imap_port', config.get('imap_port', 993))
-                        account.setdefault('imap_security', config.get('imap_security', 'SSL'))
-                        
-                        # SMTP defaults always from global SMTP config
-                        account.setdefault('smtp_host', config.get('smtp_host'))
-                        account.setdefault('smtp_port', config.get('smtp_port'))
-                        account.setdefault('smtp_username', config.get('smtp_username'))
-                        account.setdefault('smtp_password', config.get('smtp_password'))
-                        account.setdefault('smtp_security', config.get('smtp_security'))
-                        
-                        # Validate optional phone field
-                        if 'phone' in account and account['phone']:
-                            if not ConfigValidator.validate_phone(account['phone']):
-                                errors.append(f"ACCOUNTS[{idx}] 'phone' '{account['phone']}' must be 10 digits")
-                            else:
-                                account['phone'] = ConfigValidator.format_phone(account['phone'])
-                        
-                        # Validate ports
-                        if 'imap_port' in account and not ConfigValidator.validate_port(str(account['imap_port'])):
-                            errors.append(f"ACCOUNTS[{idx}] 'imap_port' must be valid (1-65535)")
-                        
-                        if not any(f"ACCOUNTS[{idx}]" in e for e in errors):
+                        # An account is valid iff _validate_account added no
+                        # errors; comparing the list length is O(1) where the
+                        # old substring scan over all errors was quadratic
+                        errors_before = len(errors)
+                        _validate_account(idx, account, config, errors)
+                        if len(errors) == errors_before:
                             validated_accounts.append(account)
-                    
+
                     config['accounts'] = validated_accounts
             except json.JSONDecodeError as e:
                 errors.append(f"ACCOUNTS is not valid JSON: {str(e)}")
@@ -220,17 +293,20 @@ class ConfigValidator:
                     'smtp_username': config.get('smtp_username'),
                     'smtp_password': config.get('smtp_password'),
                     'smtp_security': config.get('smtp_security', 'STARTTLS'),
+                    'html_enabled': config.get('html_enabled', True),
                     'forward_to': forward_to,
-                    'phone': None
+                    'phone': None,
+                    'masked_username': ConfigValidator.mask_email(config['imap_username'] or ''),
+                    'masked_forward_to': ConfigValidator.mask_email(forward_to)
                 }]
         
         # Optional settings with defaults
         config['archive_folder'] = os.getenv('ARCHIVE_FOLDER', 'Processed')
         
         poll_interval = os.getenv('POLL_INTERVAL', '60')
-        if not ConfigValidator.validate_positive_int(poll_interval):
+        config['poll_interval'], valid = _parse_positive_int(poll_interval, 60)
+        if not valid:
             errors.append(f"POLL_INTERVAL '{poll_interval}' must be a positive integer")
-        config['poll_interval'] = int(poll_interval) if ConfigValidator.validate_positive_int(poll_interval) else 60
         
         # Audio processing settings
         config['whisper_language'] = os.getenv('WHISPER_LANGUAGE', 'auto')
@@ -238,20 +314,20 @@ class ConfigValidator:
         
         # Size limits
         max_attachment_size = os.getenv('MAX_ATTACHMENT_SIZE_MB', '40')
-        if not ConfigValidator.validate_positive_int(max_attachment_size):
+        config['max_attachment_size_mb'], valid = _parse_positive_int(max_attachment_size, 40)
+        if not valid:
             errors.append(f"MAX_ATTACHMENT_SIZE_MB '{max_attachment_size}' must be a positive integer")
-        config['max_attachment_size_mb'] = int(max_attachment_size) if ConfigValidator.validate_positive_int(max_attachment_size) else 40
-        
+
         max_attachments = os.getenv('MAX_ATTACHMENTS_PER_EMAIL', '10')
-        if not ConfigValidator.validate_positive_int(max_attachments):
+        config['max_attachments_per_email'], valid = _parse_positive_int(max_attachments, 10)
+        if not valid:
             errors.append(f"MAX_ATTACHMENTS_PER_EMAIL '{max_attachments}' must be a positive integer")
-        config['max_attachments_per_email'] = int(max_attachments) if ConfigValidator.validate_positive_int(max_attachments) else 10
-        
+
         # Retention policy (in days)
         retention_days = os.getenv('RETENTION_DAYS', '365')  # 1 year default
-        if not ConfigValidator.validate_positive_int(retention_days):
+        config['retention_days'], valid = _parse_positive_int(retention_days, 365)
+        if not valid:
             errors.append(f"RETENTION_DAYS '{retention_days}' must be a positive integer")
-        config['retention_days'] = int(retention_days) if ConfigValidator.validate_positive_int(retention_days) else 365
         
         # Network retry settings
         config['max_retries'] = int(os.getenv('MAX_RETRIES', '3'))
@@ -269,6 +345,10 @@ class ConfigValidator:
     @staticmethod
     def log_config(config: Dict[str, Any]) -> None:
         """Log configuration (without passwords)"""
+        # All the masking below is wasted work if INFO is suppressed
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         logger.info("Configuration loaded:")
         for key, value in config.items():
             if key == 'accounts' and isinstance(value, list):
@@ -278,17 +358,17 @@ class ConfigValidator:
                     safe_acc = {
                         'name': acc.get('name', 'Unknown'),
                         'imap_host': acc.get('imap_host'),
-                        'imap_username': ConfigValidator.mask_email(acc.get('imap_username', '')),
-                        'forward_to': ConfigValidator.mask_email(acc.get('forward_to', '')),
+                        'imap_username': acc.get('masked_username'),
+                        'forward_to': acc.get('masked_forward_to'),
                         'phone': acc.get('phone'),
                     }
                     # Only include non-None values
                     safe_acc = {k: v for k, v in safe_acc.items() if v is not None}
                     safe_accounts.append(safe_acc)
-                logger.info(f"  {key}: {safe_accounts}")
+                logger.info("  %s: %s", key, safe_accounts)
             elif 'password' in key.lower():
-                logger.info(f"  {key}: ***")
+                logger.info("  %s: ***", key)
             elif key in ['imap_username', 'smtp_username', 'forward_to']:
-                logger.info(f"  {key}: {ConfigValidator.mask_email(value) if value else None}")
+                logger.info("  %s: %s", key, ConfigValidator.mask_email(value) if value else None)
             else:
-                logger.info(f"  {key}: {value}")
\ No newline at end of file
+                logger.info("  %s: %s", key, value)
\ No newline at end of file
@@ -1,78 +1,150 @@
+import io
 import os
 import smtplib
 import logging
+import mimetypes
 import socket
-import html
 import time
 import email.utils
+import email.policy
 from email.message import EmailMessage
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
 from retry_utils import retry_with_backoff
 from config_validator import ConfigValidator
 
 logger = logging.getLogger(__name__)
 
+# Audio file extensions we transcribe; tuple form so str.endswith can check
+# all of them in one C-level call per filename.
+_AUDIO_EXTS = ('.mp3', '.mp4', '.m4a', '.wav', '.ogg', '.flac', '.aac', '.wma', '.opus')
+
+# Escape table equivalent to html.escape(quote=True); str.translate does one
+# C-level pass instead of five chained str.replace scans.
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
+def _esc(text: str) -> str:
+    """Escape HTML entities to prevent injection"""
+    return text.translate(_HTML_ESCAPE_TABLE)
+
+
+# getfqdn() can block on reverse DNS; the name doesn't change while the
+# container runs, so resolve it once at import
+_FQDN = socket.getfqdn()
+
+# HTML templates for the forwarded body, parsed once at import; fields are
+# pre-escaped and filled in with format_map per message
+_TRANSCRIPTION_TPL = """
+                    <div style="border: 1px solid #007acc; background-color: #e6f2ff; padding: 15px; margin: 10px 0; border-radius: 5px;">
+                    <h3 style="margin-top: 0; color: #007acc;">🎙️ Audio Transcription</h3>
+                    <p style="margin: 10px 0;"><strong>Transcription of {transcribed_subject}:</strong></p>
+                    <div style="background-color: #fff; padding: 10px; border-radius: 3px; border: 1px solid #ddd;">
+                    <p style="white-space: pre-wrap; margin: 0;">{transcription}</p>
+                    </div>
+                    </div>
+                    """
+
+_HEADER_TPL = """
+                <div style="margin: 20px 0;">
+                <hr style="border: none; border-top: 2px solid #ccc;">
+                <p style="color: #666; margin: 10px 0;"><strong>---------- Forwarded message ----------</strong></p>
+                <div style="background-color: #f8f8f8; padding: 10px; border-left: 3px solid #ccc;">
+                <p style="margin: 5px 0;"><strong>From:</strong> {from_}<br>
+                <strong>Date:</strong> {date}<br>
+                <strong>Subject:</strong> {subject}<br>
+                <strong>To:</strong> {to}</p>
+                </div>
+                </div>
+                """
+
+_WRAP_TPL = """
+                <div style="margin: 10px 0;">
+                {html_body}
+                </div>
+                """
+
 
 class EmailForwarder:
-    def __init__(self, smtp_host: str, smtp_port: int, username: Optional[str] = None, 
-                 password: Optional[str] = None, connection_security: str = 'STARTTLS'):
+    def __init__(self, smtp_host: str, smtp_port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, connection_security: str = 'STARTTLS',
+                 html_enabled: bool = True):
         """
         Initialize EmailForwarder
-        
+
         Args:
             smtp_host: SMTP server hostname
             smtp_port: SMTP server port
             username: Username for authentication (optional)
             password: Password for authentication (optional)
             connection_security: 'SSL', 'STARTTLS', or 'NONE'
+            html_enabled: Whether forwards include a styled HTML body
         """
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
         self.username = username
         self.password = password
         self.connection_security = connection_security.upper()
+        self.html_enabled = html_enabled
+        # Local delivery fast paths: an SMTP_HOST that is a filesystem path
+        # means an LMTP Unix socket (e.g. /var/run/dovecot/lmtp), and TLS to
+        # loopback only buys handshake latency, so skip STARTTLS there
+        self._use_lmtp = smtp_host.startswith('/')
+        if (self.connection_security == 'STARTTLS'
+                and smtp_host in ('localhost', '127.0.0.1', '::1')):
+            logger.info("Loopback SMTP host, skipping STARTTLS")
+            self.connection_security = 'NONE'
+        # Persistent SMTP session, created lazily and reused across forwards
+        # so a batch of N messages costs one handshake/TLS/login, not N
+        self._server = None
+        # Headers identical on every message this forwarder sends
+        self._base_headers = (
+            ('From', self.username),
+            ('X-Mailer', 'Voicemail Transcriber 1.0'),
+            ('MIME-Version', '1.0'),
+        )
 
-    def forward_email(self, original_message: EmailMessage, forward_to: str, 
-                     transcription: Optional[str] = None, 
-                     audio_attachments: Optional[List[Tuple[str, bytes]]] = None,
+    def forward_email(self, original_message: EmailMessage, forward_to: str,
+                     transcription: Optional[str] = None,
+                     audio_attachments: Optional[List[Tuple[str, Union[bytes, memoryview]]]] = None,
                      phone_number: Optional[str] = None):
         try:
-            # Check if we have attachments to determine structure
-            has_attachments = False
-            for part in original_message.walk():
-                if part.get_content_disposition() == 'attachment':
-                    has_attachments = True
-                    break
-            
-            if has_attachments or audio_attachments:
-                # Mixed for attachments with alternative inside for text/html
-                msg = MIMEMultipart('mixed')
-                body_part = MIMEMultipart('alternative')
-            else:
-                # Just alternative for text/html without attachments
-                msg = MIMEMultipart('alternative')
-                body_part = msg
-            
-            msg['From'] = self.username
+            # One walk classifies every part: bodies and the non-audio
+            # attachments we forward verbatim
+            plain_body, html_body, forwarded_attachments = self._partition(original_message)
+
+            # EmailMessage upgrades itself to multipart/alternative and
+            # multipart/mixed as alternatives/attachments are added, and
+            # add_attachment base64-encodes during generation instead of
+            # holding an extra encoded copy of every payload in memory
+            msg = EmailMessage()
+
+            # Constant headers (also help prevent spam filtering)
+            for name, value in self._base_headers:
+                msg[name] = value
             msg['To'] = forward_to
-            
-            # Add phone number to subject if provided
+
+            # Read each original header once; get() walks the header list
+            # linearly and these are reused below in both body variants
             original_subject = original_message.get('Subject', 'No Subject')
+            original_from = original_message.get('From', 'Unknown')
+            original_date = original_message.get('Date', 'Unknown')
+            original_to = original_message.get('To', 'Unknown')
+
+            # Add phone number to subject if provided
             if phone_number:
                 logger.debug(f"Adding phone number {phone_number} to subject")
                 msg['Subject'] = f"[{phone_number}] Fwd: {original_subject}"
             else:
                 logger.debug("No phone number provided for subject")
                 msg['Subject'] = f"Fwd: {original_subject}"
-            
-            # Add headers to prevent spam filtering
-            msg['X-Mailer'] = 'Voicemail Transcriber 1.0'
-            msg['MIME-Version'] = '1.0'
-            msg['Message-ID'] = f"<{time.time()}.{os.getpid()}@{socket.getfqdn()}>"
+
+            msg['Message-ID'] = f"<{time.time_ns()}.{os.getpid()}@{_FQDN}>"
             msg['Date'] = email.utils.formatdate(localtime=True)
             
             # Preserve important headers from original
@@ -81,231 +153,260 @@ class EmailForwarder:
             if original_message.get('In-Reply-To'):
                 msg['In-Reply-To'] = original_message.get('In-Reply-To')
             
-            original_from = original_message.get('From', 'Unknown')
-            original_date = original_message.get('Date', 'Unknown')
-            
-            # Get both plain text and HTML versions
-            plain_body = self._get_body_text(original_message)
-            html_body = self._get_body_html(original_message)
-            
-            # Build plain text version
-            plain_parts = []
+            if not self.html_enabled:
+                # Recipient never renders HTML; skip the whole HTML branch
+                html_body = ""
             
+            # Build plain text version in a single growing buffer instead of
+            # a list of fragments joined at the end
+            buf = io.StringIO()
+
             # Add transcription first if available
             if transcription:
-                plain_parts.extend([
-                    "---------- Audio Transcription ----------",
-                    "",
-                    f"--- Transcription of {original_message.get('Subject', 'voicemail')} ---",
-                    transcription,
-                    "",
-                    "---------- End Transcription ----------",
-                    ""
-                ])
-            
+                buf.write("---------- Audio Transcription ----------\n\n")
+                buf.write(f"--- Transcription of {original_subject} ---\n")
+                buf.write(transcription)
+                buf.write("\n\n---------- End Transcription ----------\n\n")
+
             # Then add forwarded message
-            plain_parts.extend([
-                f"---------- Forwarded message ----------",
-                f"From: {original_from}",
-                f"Date: {original_date}",
-                f"Subject: {original_message.get('Subject', 'No Subject')}",
-                f"To: {original_message.get('To', 'Unknown')}",
-                "",
-                plain_body
-            ])
-            
-            plain_text = "\n".join(plain_parts)
-            body_part.attach(MIMEText(plain_text, 'plain'))
+            buf.write("---------- Forwarded message ----------\n")
+            buf.write(f"From: {original_from}\n")
+            buf.write(f"Date: {original_date}\n")
+            buf.write(f"Subject: {original_subject}\n")
+            buf.write(f"To: {original_to}\n\n")
+            buf.write(plain_body)
+
+            plain_text = buf.getvalue()
+            msg.set_content(plain_text)
             
             # Build HTML version if original had HTML
             if html_body:
+                fields = {
+                    'subject': _esc(original_subject),
+                    'from_': _esc(original_from),
+                    'date': _esc(original_date),
+                    'to': _esc(original_to),
+                    # Original HTML body is deliberately not escaped so its
+                    # formatting is preserved
+                    'html_body': html_body,
+                }
+
                 # Transcription section first if available
-                transcription_html = ""
+                parts = []
                 if transcription:
-                    # Escape HTML entities to prevent injection
-                    escaped_transcription = html.escape(transcription)
-                    escaped_subject = html.escape(original_message.get('Subject', 'voicemail'))
-                    
-                    transcription_html = f"""
-                    <div style="border: 1px solid #007acc; background-color: #e6f2ff; padding: 15px; margin: 10px 0; border-radius: 5px;">
-                    <h3 style="margin-top: 0; color: #007acc;">🎙️ Audio Transcription</h3>
-                    <p style="margin: 10px 0;"><strong>Transcription of {escaped_subject}:</strong></p>
-                    <div style="background-color: #fff; padding: 10px; border-radius: 3px; border: 1px solid #ddd;">
-                    <p style="white-space: pre-wrap; margin: 0;">{escaped_transcription}</p>
-                    </div>
-                    </div>
-                    """
-                
-                # Forwarded message header
-                html_header = f"""
-                <div style="margin: 20px 0;">
-                <hr style="border: none; border-top: 2px solid #ccc;">
-                <p style="color: #666; margin: 10px 0;"><strong>---------- Forwarded message ----------</strong></p>
-                <div style="background-color: #f8f8f8; padding: 10px; border-left: 3px solid #ccc;">
-                <p style="margin: 5px 0;"><strong>From:</strong> {html.escape(original_from)}<br>
-                <strong>Date:</strong> {html.escape(original_date)}<br>
-                <strong>Subject:</strong> {html.escape(original_message.get('Subject', 'No Subject'))}<br>
-                <strong>To:</strong> {html.escape(original_message.get('To', 'Unknown'))}</p>
-                </div>
-                </div>
-                """
-                
-                # Wrap original HTML body to preserve its formatting
-                wrapped_html_body = f"""
-                <div style="margin: 10px 0;">
-                {html_body}
-                </div>
-                """
-                
-                full_html = f"{transcription_html}{html_header}{wrapped_html_body}"
-                body_part.attach(MIMEText(full_html, 'html'))
-            
-            # If we used a separate body part, attach it to the main message
-            if body_part != msg:
-                msg.attach(body_part)
-            
-            for part in original_message.walk():
-                if part.get_content_disposition() == 'attachment':
-                    filename = part.get_filename()
-                    if filename and not self._is_audio_file(filename):
-                        attachment = MIMEBase('application', 'octet-stream')
-                        attachment.set_payload(part.get_payload(decode=True))
-                        encoders.encode_base64(attachment)
-                        attachment.add_header('Content-Disposition', f'attachment; filename= {filename}')
-                        msg.attach(attachment)
-            
+                    fields['transcription'] = _esc(transcription)
+                    fields['transcribed_subject'] = fields['subject']
+                    parts.append(_TRANSCRIPTION_TPL.format_map(fields))
+
+                parts.append(_HEADER_TPL.format_map(fields))
+                parts.append(_WRAP_TPL.format_map(fields))
+                msg.add_alternative("".join(parts), subtype='html')
+
+            if forwarded_attachments:
+                # Attach the original parts verbatim: their payloads stay in
+                # transfer encoding, skipping a base64 decode + re-encode
+                # round trip per passthrough attachment
+                if msg.get_content_type() != 'multipart/mixed':
+                    msg.make_mixed()
+                for part in forwarded_attachments:
+                    msg.attach(part)
+
             if audio_attachments:
                 for filename, content in audio_attachments:
-                    attachment = MIMEBase('application', 'octet-stream')
-                    attachment.set_payload(content)
-                    encoders.encode_base64(attachment)
-                    attachment.add_header('Content-Disposition', f'attachment; filename= {filename}')
-                    msg.attach(attachment)
+                    maintype, subtype = self._guess_mime_type(filename)
+                    if hasattr(content, 'read'):
+                        # Spooled attachment: materialize it only while it
+                        # is being encoded into the outgoing message
+                        content.seek(0)
+                        content = content.read()
+                    msg.add_attachment(content, maintype=maintype,
+                                       subtype=subtype, filename=filename)
             
             logger.debug(f"Connecting to SMTP server {self.smtp_host}:{self.smtp_port}")
-            
-            # Test connection first
-            try:
-                test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                test_socket.settimeout(5)
-                result = test_socket.connect_ex((self.smtp_host, self.smtp_port))
-                test_socket.close()
-                logger.debug(f"Socket test to {self.smtp_host}:{self.smtp_port} result: {result}")
-            except Exception as sock_e:
-                logger.error(f"Socket test failed: {sock_e}")
-            
+
+            # Flatten once with SMTP line endings; retries resend the same
+            # bytes instead of re-generating (and re-encoding) the message
+            data = msg.as_bytes(policy=email.policy.SMTP)
+            logger.debug(f"Message flattened to {len(data)} bytes")
+
             # Use retry logic for SMTP operations
-            self._send_with_retry(msg, forward_to)
+            self._send_with_retry(data, forward_to)
             
         except Exception as e:
             logger.error(f"Failed to forward email to {self.smtp_host}:{self.smtp_port} - {e}")
             raise
 
-    def _get_body_text(self, message: EmailMessage) -> str:
-        body = ""
-        
-        if message.is_multipart():
-            for part in message.walk():
-                if part.get_content_type() == "text/plain":
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        break
-                    except Exception:
-                        continue
-        else:
-            try:
-                body = message.get_payload(decode=True).decode('utf-8', errors='ignore')
-            except Exception:
-                body = str(message.get_payload())
-        
-        return body
+    def _partition(self, message: EmailMessage) -> Tuple[str, str, List[EmailMessage]]:
+        """Extract the bodies and collect non-audio attachments.
 
-    def _is_audio_file(self, filename: str) -> bool:
-        audio_extensions = {'.mp3', '.mp4', '.m4a', '.wav', '.ogg', '.flac', '.aac', '.wma', '.opus'}
-        if not filename or '.' not in filename:
-            return False
-        ext = os.path.splitext(filename.lower())[1]
-        return ext in audio_extensions
-
-    def _get_body_html(self, message: EmailMessage) -> str:
-        html = ""
-        
-        if message.is_multipart():
-            for part in message.walk():
-                if part.get_content_type() == "text/html":
-                    try:
-                        html = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        break
-                    except Exception:
-                        continue
+        Returns (plain_body, html_body, non_audio_attachment_parts); the
+        attachment parts are the original objects so their payloads are
+        never decoded on the forwarding path, and audio attachments are
+        skipped entirely (they arrive separately via the transcription
+        pipeline).
+        """
+        # get_audio_attachments caches its classification on the message;
+        # reuse it rather than walking the MIME tree a second time
+        attachments = getattr(message, '_non_audio_attachments', None)
+        if attachments is None:
+            attachments = []
+            if message.is_multipart():
+                for part in message.walk():
+                    if (not part.is_multipart()
+                            and part.get_content_disposition() == 'attachment'):
+                        filename = part.get_filename()
+                        if filename and not self._is_audio_file(filename):
+                            attachments.append(part)
+
+        if hasattr(message, 'get_body'):
+            # Messages from get_message are parsed with policy.default, so
+            # get_body can pick the right alternative for us
+            plain = self._get_body_content(message, 'plain')
+            html_body = self._get_body_content(message, 'html')
         else:
-            if message.get_content_type() == "text/html":
+            # compat32-parsed message: best-effort scan
+            plain = ""
+            html_body = ""
+            if message.is_multipart():
+                for part in message.walk():
+                    if part.is_multipart() or part.get_content_disposition() == 'attachment':
+                        continue
+                    content_type = part.get_content_type()
+                    if not plain and content_type == "text/plain":
+                        plain = self._decode_part(part)
+                    elif not html_body and content_type == "text/html":
+                        html_body = self._decode_part(part)
+            elif message.get_content_type() == "text/html":
+                html_body = self._decode_part(message)
+            else:
                 try:
-                    html = message.get_payload(decode=True).decode('utf-8', errors='ignore')
+                    plain = self._decode_part(message)
                 except Exception:
-                    html = ""
-        
-        return html
-    
-    @retry_with_backoff(max_attempts=3, initial_delay=2.0, exceptions=(Exception,))
-    def _send_with_retry(self, msg, forward_to: str):
-        """Send email with retry logic"""
+                    plain = str(message.get_payload())
+
+        return plain, html_body, attachments
+
+    def _get_body_content(self, message: EmailMessage, preference: str) -> str:
+        """Fetch one body flavor via the policy-aware get_body path"""
+        body = message.get_body(preferencelist=(preference,))
+        if body is None:
+            return ""
+        try:
+            return body.get_content()
+        except Exception:
+            # Unknown charset or malformed part; fall back to manual decode
+            return self._decode_part(body)
+
+    @staticmethod
+    def _decode_part(part) -> str:
+        """Decode a text part using the charset declared in its Content-Type"""
+        charset = part.get_content_charset() or 'utf-8'
+        try:
+            return part.get_payload(decode=True).decode(charset, errors='ignore')
+        except LookupError:
+            # Unknown/typo'd charset label; fall back to utf-8
+            return part.get_payload(decode=True).decode('utf-8', errors='ignore')
+
+    def _is_audio_file(self, filename: str) -> bool:
+        return bool(filename) and filename.lower().endswith(_AUDIO_EXTS)
+
+    @staticmethod
+    def _guess_mime_type(filename: str) -> Tuple[str, str]:
+        """Guess a maintype/subtype pair from the filename, so voicemail
+        attachments go out as audio/mpeg etc. rather than octet-stream"""
+        mime_type, encoding = mimetypes.guess_type(filename)
+        if mime_type and not encoding and '/' in mime_type:
+            maintype, _, subtype = mime_type.partition('/')
+            return maintype, subtype
+        return 'application', 'octet-stream'
+
+    def _connect(self, timeout: int = 30):
+        """Open and authenticate a new SMTP (or LMTP) session"""
+        if self._use_lmtp:
+            # Unix-socket delivery to a co-located MTA: no TCP handshake,
+            # no TLS, no AUTH
+            logger.debug(f"Connecting to LMTP socket {self.smtp_host}")
+            return smtplib.LMTP(self.smtp_host)
+
         # Choose the appropriate SMTP class based on connection security
         if self.connection_security == 'SSL':
             logger.debug(f"Connecting to SMTP server using SSL on {self.smtp_host}:{self.smtp_port}")
-            smtp_class = smtplib.SMTP_SSL
-            server = smtp_class(self.smtp_host, self.smtp_port, timeout=30)
+            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=timeout)
         else:
             logger.debug(f"Connecting to SMTP server on {self.smtp_host}:{self.smtp_port}")
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
-        
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=timeout)
+
+        logger.debug("SMTP connection established")
+
+        # Apply STARTTLS if requested
+        if self.connection_security == 'STARTTLS':
+            logger.debug("Starting TLS")
+            server.starttls()
+
+        # Authenticate if credentials provided
+        if self.username and self.password:
+            logger.debug(f"Logging in as {ConfigValidator.mask_email(self.username)}")
+            server.login(self.username, self.password)
+            logger.debug("Login successful")
+        else:
+            logger.debug("No authentication credentials provided, sending without auth")
+
+        return server
+
+    def _drop_server(self):
+        """Discard the cached SMTP session without raising"""
+        if self._server is not None:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+            self._server = None
+
+    def close(self):
+        """Cleanly close the persistent SMTP session, if any"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+                logger.debug("SMTP connection closed")
+            except Exception as e:
+                logger.debug(f"Error closing SMTP connection: {e}")
+            finally:
+                self._server = None
+
+    @retry_with_backoff(max_attempts=3, initial_delay=2.0, exceptions=(Exception,))
+    def _send_with_retry(self, data: bytes, forward_to: str):
+        """Send pre-flattened message bytes, reusing the cached SMTP session"""
+        # Check the cached session is still alive before reusing it
+        if self._server is not None:
+            try:
+                self._server.noop()
+            except Exception:
+                logger.debug("Cached SMTP connection is stale, reconnecting")
+                self._drop_server()
+
+        if self._server is None:
+            self._server = self._connect()
+
         try:
-            logger.debug("SMTP connection established")
-            
-            # Apply STARTTLS if requested
-            if self.connection_security == 'STARTTLS':
-                logger.debug("Starting TLS")
-                server.starttls()
-            
-            # Authenticate if credentials provided
-            if self.username and self.password:
-                logger.debug(f"Logging in as {ConfigValidator.mask_email(self.username)}")
-                server.login(self.username, self.password)
-                logger.debug("Login successful")
-            else:
-                logger.debug("No authentication credentials provided, sending without auth")
-            
-            # Send the message
             logger.debug("Sending message")
-            server.send_message(msg)
+            # Null envelope sender when running without auth (open relay)
+            self._server.sendmail(self.username or '', [forward_to], data)
             logger.info(f"Email forwarded successfully to {ConfigValidator.mask_email(forward_to)}")
-            
-        finally:
-            server.quit()
+        except Exception:
+            # Session state is unknown after a failed send; reconnect on retry
+            self._drop_server()
+            raise
     
     def test_connection(self) -> bool:
         """Test SMTP connection without sending email"""
         try:
-            # Choose the appropriate SMTP class
-            if self.connection_security == 'SSL':
-                server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=10)
-            else:
-                server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10)
-            
+            server = self._connect(timeout=10)
             try:
-                # Apply STARTTLS if requested
-                if self.connection_security == 'STARTTLS':
-                    server.starttls()
-                
-                # Try to login if credentials provided
-                if self.username and self.password:
-                    server.login(self.username, self.password)
-                
                 logger.debug("SMTP connection test successful")
                 return True
             finally:
                 server.quit()
-                
+
         except Exception as e:
             logger.error(f"SMTP connection test failed: {e}")
             return False
\ No newline at end of file
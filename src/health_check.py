@@ -16,18 +16,53 @@ class HealthCheck:
         self.consecutive_failures = 0
         self.max_consecutive_failures = 5
         self.max_time_without_success = timedelta(minutes=10)
-        
+        # Throttle health-file writes; per-message mark_healthy calls within
+        # this window just update in-memory state
+        self.min_write_interval = timedelta(seconds=1)
+        self._last_write: Optional[datetime] = None
+        # The health file is the durable copy of our state; pick up where a
+        # previous process left off rather than starting from a clean slate
+        self._recover_state()
+
+    def _recover_state(self):
+        """Restore failure count and last-success time from the health file"""
+        try:
+            stat = os.stat(self.health_file)
+        except (FileNotFoundError, OSError):
+            return
+
+        try:
+            with open(self.health_file) as f:
+                for line in f:
+                    if line.startswith('consecutive_failures:'):
+                        self.consecutive_failures = int(line.split(':', 1)[1])
+            # The file is rewritten on every (unthrottled) successful
+            # process, so its mtime is the last success time
+            self.last_successful_process = datetime.fromtimestamp(stat.st_mtime)
+            logger.debug(f"Recovered health state: failures={self.consecutive_failures}, "
+                         f"last_success={self.last_successful_process.isoformat()}")
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not recover health state: {e}")
+
     def mark_healthy(self):
         """Mark the service as healthy"""
         try:
-            self.last_successful_process = datetime.now()
+            now = datetime.now()
+            self.last_successful_process = now
             self.consecutive_failures = 0
-            
-            # Write health file
-            with open(self.health_file, 'w') as f:
-                f.write(f"healthy at {datetime.now().isoformat()}\n")
-                f.write(f"consecutive_failures: {self.consecutive_failures}\n")
-                
+
+            if self._last_write and now - self._last_write < self.min_write_interval:
+                return
+
+            # Write the whole payload to a temp file and rename it into
+            # place so the orchestrator never reads a half-written file
+            payload = f"healthy at {now.isoformat()}\nconsecutive_failures: 0\n"
+            tmp_file = self.health_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_file, self.health_file)
+            self._last_write = now
+
             logger.debug("Health check marked as healthy")
         except Exception as e:
             logger.error(f"Failed to write health file: {e}")
@@ -36,23 +71,51 @@ class HealthCheck:
         """Mark a processing failure"""
         self.consecutive_failures += 1
         logger.warning(f"Processing failure recorded. Consecutive failures: {self.consecutive_failures}")
-        
+
         if self.consecutive_failures >= self.max_consecutive_failures:
             self.mark_unhealthy("Too many consecutive failures")
+        else:
+            self._persist_failures()
+
+    def _persist_failures(self):
+        """Record the failure count in the health file without disturbing
+        its mtime, which stands for the last successful process"""
+        try:
+            stat = os.stat(self.health_file)
+        except (FileNotFoundError, OSError):
+            return
+
+        try:
+            last_success = datetime.fromtimestamp(stat.st_mtime)
+            payload = (f"healthy at {last_success.isoformat()}\n"
+                       f"consecutive_failures: {self.consecutive_failures}\n")
+            tmp_file = self.health_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_file, self.health_file)
+            os.utime(self.health_file, (stat.st_atime, stat.st_mtime))
+        except OSError as e:
+            logger.debug(f"Could not persist failure count: {e}")
     
     def mark_unhealthy(self, reason: str):
         """Mark the service as unhealthy"""
         try:
             logger.error(f"Service marked as unhealthy: {reason}")
-            if os.path.exists(self.health_file):
+            # The file is gone, so the next mark_healthy must write through
+            self._last_write = None
+            try:
                 os.remove(self.health_file)
+            except FileNotFoundError:
+                pass
         except Exception as e:
             logger.error(f"Failed to remove health file: {e}")
     
     def check_health(self) -> bool:
         """Check if the service is healthy"""
-        # Check if health file exists
-        if not os.path.exists(self.health_file):
+        # Check if health file exists (EAFP: one stat, no TOCTOU window)
+        try:
+            os.stat(self.health_file)
+        except FileNotFoundError:
             return False
         
         # Check consecutive failures
@@ -80,8 +143,11 @@ class HealthCheck:
     def shutdown(self):
         """Clean up health file on shutdown"""
         try:
-            if os.path.exists(self.health_file):
+            self._last_write = None
+            try:
                 os.remove(self.health_file)
+            except FileNotFoundError:
+                pass
             logger.info("Health check cleaned up")
         except Exception as e:
             logger.error(f"Failed to clean up health file: {e}")
\ No newline at end of file
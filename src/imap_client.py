@@ -1,15 +1,67 @@
 import os
 import email
+import email.policy
 import logging
 import time
+import binascii
+import tempfile
 from typing import List, Tuple, Optional
 from datetime import datetime
+import socket
 from imapclient import IMAPClient
+from imapclient.exceptions import IMAPClientAbortError
 from email.message import EmailMessage
 from retry_utils import retry_with_backoff, RetryableConnection
 
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying on an established session: transient transport
+# failures and aborted IMAP connections. Everything else (auth rejections,
+# protocol errors, bad search criteria) fails the same way on every attempt
+# and should surface immediately instead of burning backoff delays.
+_RETRYABLE = (ConnectionError, TimeoutError, socket.timeout, IMAPClientAbortError)
+
+# Audio file extensions we transcribe, hoisted so the set isn't rebuilt on
+# every get_audio_attachments call; dotless so the check is a cheap
+# rpartition on the filename tail
+_AUDIO_EXTS = frozenset({'mp3', 'mp4', 'm4a', 'wav', 'ogg', 'flac', 'aac', 'wma', 'opus'})
+
+# Chunk size for streaming base64 decode, and the line breaks to strip so
+# every chunk stays aligned on 4-character base64 groups
+_DECODE_CHUNK = 64 * 1024
+_B64_STRIP = str.maketrans('', '', '\r\n')
+
+
+def _stream_decode_base64(encoded: str, out):
+    """Decode a base64 payload into a file object in 64 KB chunks.
+
+    Avoids materializing the whole decoded payload: peak extra memory is
+    one chunk instead of the full attachment plus decode intermediates.
+    """
+    carry = ''
+    for start in range(0, len(encoded), _DECODE_CHUNK):
+        chunk = (carry + encoded[start:start + _DECODE_CHUNK]).translate(_B64_STRIP)
+        trailing = len(chunk) & 3
+        if trailing:
+            carry = chunk[-trailing:]
+            chunk = chunk[:-trailing]
+        else:
+            carry = ''
+        if chunk:
+            out.write(binascii.a2b_base64(chunk))
+    if carry:
+        # Truncated final group; pad so the leftover bits still decode
+        out.write(binascii.a2b_base64(carry + '=' * (-len(carry) & 3)))
+
+
+def attachment_size(audio_file) -> int:
+    """Size in bytes of a spooled attachment, without reading it"""
+    pos = audio_file.tell()
+    audio_file.seek(0, os.SEEK_END)
+    size = audio_file.tell()
+    audio_file.seek(pos)
+    return size
+
 
 class IMAPEmailClient(RetryableConnection):
     def __init__(self, host: str, username: str, password: str, port: int = 993, 
@@ -21,8 +73,12 @@ class IMAPEmailClient(RetryableConnection):
         self.port = port
         self.connection_security = connection_security.upper()
         self.client = None
+        self._last_folder = None
+        # Folder names seen via LIST, cached per connection so the archive
+        # check doesn't replay a full LIST every poll cycle
+        self._folders = None
 
-    @retry_with_backoff(max_attempts=3, initial_delay=2.0, exceptions=(Exception,))
+    @retry_with_backoff(max_attempts=3, initial_delay=2.0, exceptions=(OSError,))
     def connect(self):
         try:
             # Use SSL for SSL connections, no SSL for STARTTLS (will upgrade later)
@@ -36,6 +92,7 @@ class IMAPEmailClient(RetryableConnection):
             
             self.client.login(self.username, self.password)
             logger.debug(f"Connected to IMAP server {self.host}")
+            self._folders = None
             self.reset_retry_counter()
         except Exception as e:
             logger.error(f"Failed to connect to IMAP server: {e}")
@@ -50,11 +107,68 @@ class IMAPEmailClient(RetryableConnection):
                 logger.error(f"Error during disconnect: {e}")
             finally:
                 self.client = None
+                self._last_folder = None
+                self._folders = None
+
+    def ensure_connected(self):
+        """Verify the connection is alive, reconnecting if it has dropped.
+
+        A NOOP round-trip detects stale TLS sessions; on failure the client
+        reconnects and re-selects the previously selected folder, so callers
+        can hold one client across poll cycles instead of reconnecting
+        every time.
+        """
+        if self.client:
+            try:
+                self.client.noop()
+                return
+            except Exception as e:
+                logger.warning(f"IMAP connection to {self.host} went stale ({e}), reconnecting")
+                try:
+                    self.client.shutdown()
+                except Exception:
+                    pass
+                self.client = None
+
+        last_folder = self._last_folder
+        self.connect()
+        if last_folder:
+            self.select_folder(last_folder)
 
     def select_folder(self, folder: str = "INBOX"):
         if not self.client:
             raise RuntimeError("Not connected to IMAP server")
         self.client.select_folder(folder)
+        self._last_folder = folder
+
+    def supports_idle(self) -> bool:
+        """True when connected to a server advertising the IDLE capability"""
+        return bool(self.client) and self.client.has_capability('IDLE')
+
+    def wait_for_new(self, timeout: int = 300) -> bool:
+        """Block on IMAP IDLE until the server reports new mail or timeout.
+
+        Returns True if an EXISTS/RECENT untagged response arrived, False on
+        a quiet timeout. Falls back to False if the server lacks IDLE.
+        """
+        if not self.client:
+            raise RuntimeError("Not connected to IMAP server")
+
+        if not self.client.has_capability('IDLE'):
+            logger.debug(f"Server {self.host} does not support IDLE")
+            return False
+
+        self.client.idle()
+        try:
+            responses = self.client.idle_check(timeout=timeout)
+        finally:
+            self.client.idle_done()
+
+        for response in responses or []:
+            if len(response) >= 2 and response[1] in (b'EXISTS', b'RECENT'):
+                logger.debug(f"IDLE push: {response}")
+                return True
+        return False
 
     def get_unread_messages(self) -> List[int]:
         if not self.client:
@@ -62,38 +176,115 @@ class IMAPEmailClient(RetryableConnection):
         return self.client.search(['UNSEEN'])
     
     def get_all_messages(self) -> List[int]:
+        return self.search(['ALL'])
+
+    def search(self, criteria) -> List[int]:
+        """Run an arbitrary server-side SEARCH (e.g. ['UNSEEN'] or a FROM
+        restriction) so filtering happens before any bodies are fetched"""
         if not self.client:
             raise RuntimeError("Not connected to IMAP server")
-        return self.client.search(['ALL'])
+        return self.client.search(criteria)
 
-    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=(Exception,))
+    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=_RETRYABLE)
     def get_message(self, msg_id: int) -> EmailMessage:
         if not self.client:
             raise RuntimeError("Not connected to IMAP server")
-        
-        raw_message = self.client.fetch([msg_id], ['RFC822'])[msg_id][b'RFC822']
-        return email.message_from_bytes(raw_message)
+
+        # BODY.PEEK[] fetches the same bytes as RFC822 without the server
+        # setting \Seen as a side effect; the default policy parses into the
+        # modern EmailMessage API with lower memory overhead
+        raw_message = self.client.fetch([msg_id], ['BODY.PEEK[]'])[msg_id][b'BODY[]']
+        return email.message_from_bytes(raw_message, policy=email.policy.default)
+
+    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=_RETRYABLE)
+    def _fetch_chunk(self, msg_ids: List[int]) -> dict:
+        return self.client.fetch(msg_ids, ['BODY.PEEK[]'])
+
+    def iter_messages(self, msg_ids: List[int], batch_size: int = 100):
+        """Fetch messages in bulk, yielding (msg_id, EmailMessage) pairs.
+
+        One FETCH round-trip covers batch_size messages, so N messages cost
+        ceil(N/batch_size) round-trips instead of N; batch_size is capped to
+        keep a single request under typical server size limits. Parsing is
+        lazy, one message at a time, so memory stays bounded by one batch
+        of raw bytes.
+        """
+        if not self.client:
+            raise RuntimeError("Not connected to IMAP server")
+
+        for start in range(0, len(msg_ids), batch_size):
+            chunk = msg_ids[start:start + batch_size]
+            response = self._fetch_chunk(chunk)
+            for msg_id in chunk:
+                data = response.get(msg_id)
+                raw_message = data.get(b'BODY[]') if data else None
+                if raw_message is not None:
+                    yield msg_id, email.message_from_bytes(raw_message, policy=email.policy.default)
+
+    def get_messages(self, msg_ids: List[int], batch_size: int = 100) -> dict:
+        """Batched variant of get_message; returns {msg_id: EmailMessage}"""
+        return dict(self.iter_messages(msg_ids, batch_size))
 
     def mark_as_read(self, msg_id: int):
         if not self.client:
             raise RuntimeError("Not connected to IMAP server")
         self.client.add_flags([msg_id], ['\\Seen'])
 
-    def get_audio_attachments(self, message: EmailMessage) -> List[Tuple[str, bytes]]:
+    def mark_as_read_bulk(self, msg_ids: List[int]):
+        """Mark many messages \\Seen with one STORE command"""
+        if not self.client:
+            raise RuntimeError("Not connected to IMAP server")
+        if msg_ids:
+            self.client.add_flags(msg_ids, ['\\Seen'])
+
+    def get_audio_attachments(self, message: EmailMessage) -> Tuple[List[Tuple[str, tempfile.SpooledTemporaryFile]], int]:
+        """Extract audio attachments into spooled files.
+
+        Returns (attachments, total_bytes); the total falls out of the
+        extraction walk, so callers checking size limits don't re-measure
+        every file afterwards.
+        """
         audio_attachments = []
-        audio_extensions = {'.mp3', '.mp4', '.m4a', '.wav', '.ogg', '.flac', '.aac', '.wma', '.opus'}
-        
+        non_audio_parts = []
+        total_bytes = 0
+
         for part in message.walk():
             if part.get_content_disposition() == 'attachment':
                 filename = part.get_filename()
                 if filename:
-                    ext = os.path.splitext(filename.lower())[1]
-                    if ext in audio_extensions or part.get_content_type().startswith('audio/'):
-                        content = part.get_payload(decode=True)
-                        audio_attachments.append((filename, content))
-                        logger.info(f"Found audio attachment: {filename}")
-        
-        return audio_attachments
+                    # rpartition lowercases just the extension instead of
+                    # splitext over the whole (already lowered) name; with
+                    # no dot it returns the whole filename, which must not
+                    # match (an attachment named 'mp3' is not audio)
+                    ext = filename.rpartition('.')[2].lower() if '.' in filename else ''
+                    if ext in _AUDIO_EXTS or part.get_content_type().startswith('audio/'):
+                        # Stream the decode into a spooled file: small clips
+                        # stay in RAM, multi-MB voicemails spill to disk
+                        # instead of living as whole bytes objects for the
+                        # entire transcribe+forward pipeline
+                        buf = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+                        if part.get('Content-Transfer-Encoding', '').strip().lower() == 'base64':
+                            _stream_decode_base64(part.get_payload(), buf)
+                        else:
+                            content = part.get_payload(decode=True)
+                            if content:
+                                buf.write(content)
+                        if buf.tell():
+                            total_bytes += buf.tell()
+                            buf.seek(0)
+                            audio_attachments.append((filename, buf))
+                            logger.info(f"Found audio attachment: {filename}")
+                        else:
+                            buf.close()
+                    else:
+                        non_audio_parts.append(part)
+
+        # Cache the classification on the message so the forwarder reuses
+        # this walk's verdict instead of re-traversing the MIME tree (and
+        # re-deciding what counts as audio)
+        message._non_audio_attachments = non_audio_parts
+
+        return audio_attachments, total_bytes
     
     def create_folder_if_not_exists(self, folder_name: str):
         """Create a folder if it doesn't exist"""
@@ -101,37 +292,74 @@ class IMAPEmailClient(RetryableConnection):
             raise RuntimeError("Not connected to IMAP server")
         
         try:
-            # Check if folder exists
-            folders = self.client.list_folders()
-            folder_names = [f[2] for f in folders]
-            
-            if folder_name not in folder_names:
+            # LIST once per connection; the answer only changes when we
+            # create a folder ourselves
+            if self._folders is None:
+                self._folders = {f[2] for f in self.client.list_folders()}
+
+            if folder_name not in self._folders:
                 self.client.create_folder(folder_name)
+                self._folders.add(folder_name)
                 logger.info(f"Created folder: {folder_name}")
             else:
                 logger.debug(f"Folder already exists: {folder_name}")
         except Exception as e:
             logger.error(f"Error creating folder {folder_name}: {e}")
+            # The cache may be stale relative to whatever went wrong
+            self._folders = None
             raise
     
-    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=(Exception,))
+    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=_RETRYABLE)
     def move_message(self, msg_id: int, destination_folder: str):
         """Move a message to another folder"""
         if not self.client:
             raise RuntimeError("Not connected to IMAP server")
         
         try:
-            # Copy message to destination folder
-            self.client.copy([msg_id], destination_folder)
-            # Mark original for deletion
-            self.client.add_flags([msg_id], ['\\Deleted'])
-            # Expunge to actually delete
-            self.client.expunge()
+            if self.client.has_capability('MOVE'):
+                # One atomic UID MOVE instead of COPY + \Deleted + EXPUNGE,
+                # and no folder-wide expunge as a side effect
+                self.client.move([msg_id], destination_folder)
+            else:
+                # Copy message to destination folder
+                self.client.copy([msg_id], destination_folder)
+                # Mark original for deletion
+                self.client.add_flags([msg_id], ['\\Deleted'])
+                # Expunge to actually delete
+                self.client.expunge()
             logger.info(f"Moved message {msg_id} to {destination_folder}")
         except Exception as e:
             logger.error(f"Error moving message {msg_id} to {destination_folder}: {e}")
             raise
     
+    @retry_with_backoff(max_attempts=2, initial_delay=1.0, exceptions=_RETRYABLE)
+    def move_messages_bulk(self, msg_ids: List[int], destination_folder: str):
+        """Move a batch of messages with a constant number of round-trips.
+
+        One MOVE (or COPY + STORE + EXPUNGE on older servers) covers the
+        whole batch, instead of three round-trips and a folder-wide expunge
+        per message.
+        """
+        if not self.client:
+            raise RuntimeError("Not connected to IMAP server")
+        if not msg_ids:
+            return
+
+        try:
+            if self.client.has_capability('MOVE'):
+                self.client.move(msg_ids, destination_folder)
+            else:
+                self.client.copy(msg_ids, destination_folder)
+                self.client.add_flags(msg_ids, ['\\Deleted'])
+                if self.client.has_capability('UIDPLUS'):
+                    self.client.expunge(msg_ids)
+                else:
+                    self.client.expunge()
+            logger.info(f"Moved {len(msg_ids)} messages to {destination_folder}")
+        except Exception as e:
+            logger.error(f"Error moving {len(msg_ids)} messages to {destination_folder}: {e}")
+            raise
+
     def delete_old_messages(self, folder: str, retention_days: int):
         """Delete messages older than retention_days from specified folder"""
         if not self.client:
@@ -152,8 +380,13 @@ class IMAPEmailClient(RetryableConnection):
                 logger.info(f"Found {len(old_messages)} messages older than {retention_days} days in {folder}")
                 # Mark for deletion
                 self.client.add_flags(old_messages, ['\\Deleted'])
-                # Expunge to actually delete
-                self.client.expunge()
+                if self.client.has_capability('UIDPLUS'):
+                    # UID EXPUNGE removes just these messages instead of
+                    # scanning every \Deleted message in a large archive
+                    self.client.expunge(old_messages)
+                else:
+                    # Expunge to actually delete
+                    self.client.expunge()
                 logger.info(f"Deleted {len(old_messages)} old messages from {folder}")
             else:
                 logger.debug(f"No messages older than {retention_days} days found in {folder}")
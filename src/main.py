@@ -1,13 +1,16 @@
 import os
 import time
+import queue
 import logging
 import signal
 import sys
 import socket
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from imap_client import IMAPEmailClient
+from imap_client import IMAPEmailClient, attachment_size
 from email_forwarder import EmailForwarder
 from whisper_transcriber import WhisperTranscriber
 from config_validator import ConfigValidator
@@ -24,8 +27,14 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-# Global flag for graceful shutdown
-shutdown_requested = False
+# Graceful-shutdown event: setting it wakes the inter-cycle sleep and
+# IDLE waits immediately instead of being polled once a second
+shutdown_event = threading.Event()
+
+# Wake event of the in-flight inter-cycle IDLE wait, if one is running;
+# the signal handler sets it so accounts parked on the event (no-IDLE
+# servers) unblock immediately instead of sleeping out the interval
+_cycle_wake = None
 
 # Global health check instance
 health_check = None
@@ -33,56 +42,77 @@ health_check = None
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
-    global shutdown_requested, health_check
+    global health_check
     logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-    shutdown_requested = True
+    shutdown_event.set()
+    wake = _cycle_wake
+    if wake is not None:
+        wake.set()
     if health_check:
         health_check.shutdown()
 
 
-def validate_connections(config):
-    """Validate all account connections on startup"""
-    logger.info("Validating connections...")
-    
-    # Test each account's IMAP connection
-    for idx, account in enumerate(config['accounts']):
-        logger.info(f"Validating {account['name']}...")
-        
-        # Test IMAP connection
+def _validate_account_connections(account, config):
+    """Validate one account's IMAP and SMTP connections.
+
+    Returns an error string, or None when everything checks out. Runs on a
+    worker thread, so failures are reported rather than raised.
+    """
+    logger.info(f"Validating {account['name']}...")
+
+    # Test IMAP connection
+    try:
+        imap_client = IMAPEmailClient(
+            account['imap_host'],
+            account['imap_username'],
+            account['imap_password'],
+            account['imap_port'],
+            account.get('imap_security', 'SSL')
+        )
+        imap_client.connect()
+        imap_client.disconnect()
+        logger.info(f"{account['name']}: IMAP connection validated successfully")
+    except Exception as e:
+        return f"{account['name']}: IMAP connection validation failed: {e}"
+
+    # Test SMTP connection (if account has custom SMTP settings)
+    smtp_host = account.get('smtp_host', config.get('smtp_host'))
+    if smtp_host:
         try:
-            imap_client = IMAPEmailClient(
-                account['imap_host'], 
-                account['imap_username'], 
-                account['imap_password'], 
-                account['imap_port'],
-                account.get('imap_security', 'SSL')
+            email_forwarder = EmailForwarder(
+                smtp_host,
+                account.get('smtp_port', config.get('smtp_port', 587)),
+                account.get('smtp_username', config.get('smtp_username')),
+                account.get('smtp_password', config.get('smtp_password')),
+                account.get('smtp_security', config.get('smtp_security', 'STARTTLS'))
             )
-            imap_client.connect()
-            imap_client.disconnect()
-            logger.info(f"{account['name']}: IMAP connection validated successfully")
+            if email_forwarder.test_connection():
+                logger.info(f"{account['name']}: SMTP connection validated successfully")
+            else:
+                return f"{account['name']}: SMTP connection test failed"
         except Exception as e:
-            logger.error(f"{account['name']}: IMAP connection validation failed: {e}")
-            sys.exit(1)
-        
-        # Test SMTP connection (if account has custom SMTP settings)
-        smtp_host = account.get('smtp_host', config.get('smtp_host'))
-        if smtp_host:
-            try:
-                email_forwarder = EmailForwarder(
-                    smtp_host,
-                    account.get('smtp_port', config.get('smtp_port', 587)),
-                    account.get('smtp_username', config.get('smtp_username')),
-                    account.get('smtp_password', config.get('smtp_password')),
-                    account.get('smtp_security', config.get('smtp_security', 'STARTTLS'))
-                )
-                if email_forwarder.test_connection():
-                    logger.info(f"{account['name']}: SMTP connection validated successfully")
-                else:
-                    logger.error(f"{account['name']}: SMTP connection test failed")
-                    sys.exit(1)
-            except Exception as e:
-                logger.error(f"{account['name']}: SMTP configuration validation failed: {e}")
-                sys.exit(1)
+            return f"{account['name']}: SMTP configuration validation failed: {e}"
+
+    return None
+
+
+def validate_connections(config):
+    """Validate all account connections on startup"""
+    logger.info("Validating connections...")
+
+    # Validate accounts concurrently: startup cost is the slowest
+    # handshake instead of the sum of every TLS + LOGIN round-trip
+    with ThreadPoolExecutor(max_workers=len(config['accounts']),
+                            thread_name_prefix='validate') as pool:
+        errors = [error for error in
+                  pool.map(lambda a: _validate_account_connections(a, config),
+                           config['accounts'])
+                  if error]
+
+    if errors:
+        for error in errors:
+            logger.error(error)
+        sys.exit(1)
 
 
 def send_startup_notification(config, device_info):
@@ -133,8 +163,7 @@ Service Information:
 Monitored Accounts:
 """
         for account in config['accounts']:
-            masked_email = ConfigValidator.mask_email(account['imap_username'])
-            content += f"  • {account['name']}: {masked_email} → {ConfigValidator.mask_email(account['forward_to'])}"
+            content += f"  • {account['name']}: {account['masked_username']} → {account['masked_forward_to']}"
             if account.get('phone'):
                 content += f" [{account['phone']}]"
             content += "\n"
@@ -163,7 +192,7 @@ This notification confirms that:
                 server.login(smtp_user, smtp_pass)
             
             server.send_message(msg)
-            logger.info(f"Startup notification sent to {ConfigValidator.mask_email(recipient)}")
+            logger.info(f"Startup notification sent to {config['accounts'][0]['masked_forward_to']}")
         finally:
             server.quit()
             
@@ -172,6 +201,289 @@ This notification confirms that:
         # Don't fail the startup if notification fails
 
 
+# Forwarded messages are archived in batches of this size; small enough
+# that a crash re-forwards at most a handful, large enough to amortize the
+# per-move round-trips
+_MOVE_BATCH = 25
+
+
+def _forward_worker(work_queue, email_forwarder, imap_mover, archive_folder,
+                    stats, forward_to, phone_number, metrics):
+    """Forwarding stage of the per-account pipeline.
+
+    Pops (msg_id, message, transcription, audio_attachments, started)
+    tuples, forwards via SMTP and archives via its own IMAP session, so the
+    network I/O here overlaps the producer's GPU-bound transcription of the
+    next message. Archive moves are accumulated and flushed in batches.
+    A None item shuts the worker down.
+    """
+    pending_moves = []
+
+    def flush_moves():
+        if not pending_moves:
+            return
+        try:
+            imap_mover.move_messages_bulk(pending_moves, archive_folder)
+        except Exception as e:
+            # Already forwarded; they stay in INBOX and are re-forwarded
+            # next cycle, same as a failed per-message move before
+            logger.error(f"Failed to archive {len(pending_moves)} messages: {e}")
+            health_check.mark_failure()
+        finally:
+            pending_moves.clear()
+
+    while True:
+        item = work_queue.get()
+        if item is None:
+            flush_moves()
+            work_queue.task_done()
+            return
+        msg_id, message, transcription, audio_attachments, started = item
+        try:
+            email_forwarder.forward_email(
+                message,
+                forward_to,
+                transcription if transcription else None,
+                audio_attachments,
+                phone_number
+            )
+            logger.info(f"Message {msg_id} processed and forwarded")
+            pending_moves.append(msg_id)
+            stats['messages_processed'] += 1
+            stats['last_activity'] = datetime.now()
+            health_check.mark_healthy()
+            metrics.end_processing(success=True, start_time=started)
+            if len(pending_moves) >= _MOVE_BATCH:
+                flush_moves()
+        except Exception as e:
+            logger.error(f"Failed to forward message {msg_id}: {e}", exc_info=True)
+            health_check.mark_failure()
+            metrics.end_processing(success=False, start_time=started)
+        finally:
+            # Spooled audio files are finished with once forwarded
+            for _, audio_file in audio_attachments:
+                try:
+                    audio_file.close()
+                except Exception:
+                    pass
+            work_queue.task_done()
+
+
+# IDLE waits run in slices this long so a push on one account (or a
+# shutdown signal) wakes every other account's wait within one slice;
+# idle_check can't be interrupted mid-slice, so this must stay under
+# Docker's default 10 s stop-grace period for SIGTERM to beat SIGKILL
+_IDLE_SLICE = 8
+
+
+def _idle_account(client, wake, deadline):
+    """IDLE one account's connection until mail arrives or deadline passes.
+
+    Sets (and watches) the shared wake event so the first account to see
+    new mail ends the wait for all of them. Connections without IDLE just
+    park on the event. Returns True if this account saw new mail.
+    """
+    try:
+        if shutdown_event.is_set():
+            return False
+        if not client.supports_idle():
+            wake.wait(max(0, deadline - time.monotonic()))
+            return False
+        while not wake.is_set() and not shutdown_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if client.wait_for_new(timeout=min(_IDLE_SLICE, remaining)):
+                wake.set()
+                return True
+    except Exception as e:
+        # Drop the connection; ensure_connected revives it next cycle
+        logger.warning(f"IDLE wait failed for {client.host}: {e}")
+        client.disconnect()
+    return False
+
+
+def _pooled_imap(pool, account, role='fetch'):
+    """Get the account's persistent IMAP client, creating it on first use.
+
+    Clients live for the process lifetime keyed by (host, username, role) —
+    'fetch' is the main processing session, 'move' the pipeline's archiving
+    session — so each poll cycle pays a NOOP instead of TLS + LOGIN.
+    """
+    key = (account['imap_host'], account['imap_username'], role)
+    client = pool.get(key)
+    if client is None:
+        client = IMAPEmailClient(
+            account['imap_host'],
+            account['imap_username'],
+            account['imap_password'],
+            account['imap_port'],
+            account.get('imap_security', 'SSL')
+        )
+        pool[key] = client
+    return client
+
+
+def _process_account(account, config, whisper, whisper_lock, imap_pool,
+                     account_stats, metrics, archive_folder, last_cleanup):
+    """Process one account's INBOX for a single poll cycle.
+
+    Runs on an executor thread so accounts overlap at the I/O level; GPU
+    transcription is serialized across accounts by whisper_lock. All errors
+    are handled here — a broken account never takes the cycle down.
+    """
+    if shutdown_event.is_set():
+        return
+
+    try:
+        logger.debug(f"Processing account: {account['name']}")
+
+        # Reuse this account's persistent IMAP client
+        imap_client = _pooled_imap(imap_pool, account)
+
+        # Create SMTP forwarder for this account
+        email_forwarder = EmailForwarder(
+            account.get('smtp_host', config.get('smtp_host')),
+            account.get('smtp_port', config.get('smtp_port', 587)),
+            account.get('smtp_username', config.get('smtp_username')),
+            account.get('smtp_password', config.get('smtp_password')),
+            account.get('smtp_security', config.get('smtp_security', 'STARTTLS')),
+            account.get('html_enabled', config.get('html_enabled', True))
+        )
+
+        # ensure_connected is a NOOP round-trip when the pooled
+        # client is still live, a full connect otherwise
+        imap_client.ensure_connected()
+
+        # Create archive folder if it doesn't exist
+        imap_client.create_folder_if_not_exists(archive_folder)
+
+        # Select INBOX
+        imap_client.select_folder("INBOX")
+
+        # Get messages from INBOX; an optional per-account search_criteria
+        # narrows the set server-side (e.g. ["UNSEEN"] or a FROM
+        # restriction) before any bodies are fetched. Default stays ALL —
+        # this service forwards every email, not just voicemails.
+        all_messages = imap_client.search(
+            account.get('search_criteria') or ['ALL'])
+        logger.debug(f"Found {len(all_messages)} messages in {account['name']} INBOX")
+
+        # Update statistics
+        account_stats[account['name']]['messages_checked'] += len(all_messages)
+
+        forward_to = account['forward_to']
+        phone_number = account.get('phone', None)
+        # Limits are loop-invariant; bind them once instead of probing the
+        # config dict (and redoing the MB->bytes math) for every message
+        max_audio_bytes = config['max_attachment_size_mb'] * 1024 * 1024
+        max_attachments = config['max_attachments_per_email']
+        logger.debug(f"Account {account['name']}: forward_to={account['masked_forward_to']}, phone={phone_number}")
+
+        # Two-stage pipeline: this thread bulk-fetches and runs the
+        # GPU-bound transcription; a worker thread forwards over SMTP
+        # and archives over its own IMAP session (sessions are not
+        # thread-safe), so network waits overlap GPU compute. Moves
+        # are by UID, so they stay valid alongside concurrent fetches.
+        work_queue = queue.Queue(maxsize=4)
+        worker = None
+        if all_messages:
+            imap_mover = _pooled_imap(imap_pool, account, role='move')
+            imap_mover.ensure_connected()
+            imap_mover.select_folder("INBOX")
+            worker = threading.Thread(
+                target=_forward_worker,
+                args=(work_queue, email_forwarder, imap_mover,
+                      archive_folder, account_stats[account['name']],
+                      forward_to, phone_number, metrics),
+                name=f"forwarder-{account['name']}",
+                daemon=True
+            )
+            worker.start()
+
+        try:
+            for msg_id, message in imap_client.iter_messages(all_messages):
+                started = metrics.start_processing()
+                try:
+                    # total_size comes out of the extraction walk itself
+                    audio_attachments, total_size = imap_client.get_audio_attachments(message)
+
+                    # Check size limits
+                    if total_size > max_audio_bytes:
+                        logger.warning(f"Message {msg_id} exceeds size limit ({total_size / 1024 / 1024:.1f}MB), skipping audio processing")
+                        for _, audio_file in audio_attachments:
+                            audio_file.close()
+                        audio_attachments = []  # Skip audio processing but still forward
+
+                    if len(audio_attachments) > max_attachments:
+                        logger.warning(f"Message {msg_id} has too many attachments ({len(audio_attachments)}), processing first {max_attachments}")
+                        for _, audio_file in audio_attachments[max_attachments:]:
+                            audio_file.close()
+                        audio_attachments = audio_attachments[:max_attachments]
+
+                    transcription = ""
+                    if audio_attachments:
+                        logger.debug(f"Processing {len(audio_attachments)} audio attachments")
+                        account_stats[account['name']]['messages_with_audio'] += 1
+                        for filename, audio_data in audio_attachments:
+                            try:
+                                # One GPU: accounts take turns transcribing
+                                # but still interleave their IMAP/SMTP I/O
+                                with whisper_lock:
+                                    metrics.start_transcription()
+                                    try:
+                                        transcript = whisper.transcribe_audio(audio_data, filename)
+                                        metrics.end_transcription(success=True, bytes_processed=attachment_size(audio_data))
+                                    except Exception:
+                                        # Record while still holding the lock
+                                        # so the shared start slot can't pair
+                                        # with another account's decode
+                                        metrics.end_transcription(success=False)
+                                        raise
+                                transcription += f"\n\n--- Transcription of {filename} ---\n{transcript}\n"
+                            except Exception as e:
+                                logger.error(f"Failed to transcribe {filename}: {e}")
+                                transcription += f"\n\n--- Failed to transcribe {filename} ---\n"
+
+                    # Hand off to the forwarding stage; blocks only
+                    # when the worker falls 4 messages behind
+                    work_queue.put((msg_id, message, transcription,
+                                    audio_attachments, started))
+
+                except Exception as e:
+                    logger.error(f"Failed to process message {msg_id}: {e}", exc_info=True)
+                    health_check.mark_failure()
+                    metrics.end_processing(success=False, start_time=started)
+        finally:
+            if worker:
+                work_queue.put(None)
+                worker.join()
+
+        # Clean old messages once per day for this account
+        if datetime.now() - last_cleanup > timedelta(days=1):
+            clean_old_messages(imap_client, archive_folder, config['retention_days'])
+            # Cleanup selected the archive folder; go back to INBOX so
+            # the inter-cycle IDLE on this session watches new mail, not
+            # the archive
+            imap_client.select_folder("INBOX")
+
+        email_forwarder.close()
+
+    except KeyboardInterrupt:
+        logger.info("Keyboard interrupt received")
+        shutdown_event.set()
+    except Exception as e:
+        logger.error(f"Error processing account {account['name']}: {e}", exc_info=True)
+        health_check.mark_failure()
+        try:
+            if 'email_forwarder' in locals():
+                email_forwarder.close()
+            if 'imap_client' in locals():
+                imap_client.disconnect()
+        except Exception as disconnect_error:
+            logger.error(f"Failed to disconnect: {disconnect_error}")
+
+
 def clean_old_messages(imap_client, archive_folder, retention_days):
     """Delete messages older than retention period from archive folder"""
     try:
@@ -182,7 +494,7 @@ def clean_old_messages(imap_client, archive_folder, retention_days):
 
 
 def process_emails():
-    global health_check, shutdown_requested
+    global health_check, _cycle_wake
     
     # Get and validate configuration
     config = ConfigValidator.get_config()
@@ -221,6 +533,10 @@ def process_emails():
         language=config['whisper_language']
     )
     
+    # Pay first-call CUDA/cuDNN setup cost on silence, not the first
+    # real voicemail
+    whisper.warm_up()
+
     logger.info("Starting email processing service...")
     logger.info(f"Monitoring {len(config['accounts'])} account(s)")
     logger.info(f"Whisper device info: {whisper.get_device_info()}")
@@ -233,138 +549,44 @@ def process_emails():
     
     archive_folder = config['archive_folder']
     last_cleanup = datetime.now()
+
+    # Persistent IMAP connections, one per (host, username, role), kept for
+    # the process lifetime; ensure_connected revives any that drop. Also
+    # lets the inter-cycle wait block on IDLE over a live connection.
+    imap_pool = {}
+
+    # One worker per account; the GPU is shared, so transcription takes
+    # this lock while each account's network I/O proceeds in parallel
+    whisper_lock = threading.Lock()
+    executor = ThreadPoolExecutor(
+        max_workers=len(config['accounts']), thread_name_prefix='account')
     
     # Mark service as healthy after successful initialization
     health_check.mark_healthy()
     
-    while not shutdown_requested:
-        # Process each account
-        for account in config['accounts']:
-            if shutdown_requested:
-                break
-                
-            try:
-                logger.debug(f"Processing account: {account['name']}")
-                
-                # Create IMAP client for this account
-                imap_client = IMAPEmailClient(
-                    account['imap_host'], 
-                    account['imap_username'], 
-                    account['imap_password'], 
-                    account['imap_port'],
-                    account.get('imap_security', 'SSL')
-                )
-                
-                # Create SMTP forwarder for this account
-                email_forwarder = EmailForwarder(
-                    account.get('smtp_host', config.get('smtp_host')),
-                    account.get('smtp_port', config.get('smtp_port', 587)),
-                    account.get('smtp_username', config.get('smtp_username')),
-                    account.get('smtp_password', config.get('smtp_password')),
-                    account.get('smtp_security', config.get('smtp_security', 'STARTTLS'))
-                )
-                
-                imap_client.connect()
-                
-                # Create archive folder if it doesn't exist
-                imap_client.create_folder_if_not_exists(archive_folder)
-                
-                # Select INBOX
-                imap_client.select_folder("INBOX")
-                
-                # Get ALL messages from INBOX
-                all_messages = imap_client.get_all_messages()
-                logger.debug(f"Found {len(all_messages)} messages in {account['name']} INBOX")
-                
-                # Update statistics
-                account_stats[account['name']]['messages_checked'] += len(all_messages)
-                
-                forward_to = account['forward_to']
-                phone_number = account.get('phone', None)
-                masked_forward_to = ConfigValidator.mask_email(forward_to)
-                logger.debug(f"Account {account['name']}: forward_to={masked_forward_to}, phone={phone_number}")
-                
-                for msg_id in all_messages:
-                    try:
-                        metrics.start_processing()
-                        message = imap_client.get_message(msg_id)
-                        audio_attachments = imap_client.get_audio_attachments(message)
-                        
-                        # Check size limits
-                        total_size = sum(len(data) for _, data in audio_attachments)
-                        if total_size > config['max_attachment_size_mb'] * 1024 * 1024:
-                            logger.warning(f"Message {msg_id} exceeds size limit ({total_size / 1024 / 1024:.1f}MB), skipping audio processing")
-                            audio_attachments = []  # Skip audio processing but still forward
-                        
-                        if len(audio_attachments) > config['max_attachments_per_email']:
-                            logger.warning(f"Message {msg_id} has too many attachments ({len(audio_attachments)}), processing first {config['max_attachments_per_email']}")
-                            audio_attachments = audio_attachments[:config['max_attachments_per_email']]
-                        
-                        transcription = ""
-                        if audio_attachments:
-                            logger.debug(f"Processing {len(audio_attachments)} audio attachments")
-                            account_stats[account['name']]['messages_with_audio'] += 1
-                            for filename, audio_data in audio_attachments:
-                                try:
-                                    metrics.start_transcription()
-                                    transcript = whisper.transcribe_audio(audio_data, filename)
-                                    metrics.end_transcription(success=True, bytes_processed=len(audio_data))
-                                    transcription += f"\n\n--- Transcription of {filename} ---\n{transcript}\n"
-                                except Exception as e:
-                                    logger.error(f"Failed to transcribe {filename}: {e}")
-                                    transcription += f"\n\n--- Failed to transcribe {filename} ---\n"
-                                    metrics.end_transcription(success=False)
-                        
-                        # Forward the email (with or without transcription)
-                        email_forwarder.forward_email(
-                            message, 
-                            forward_to, 
-                            transcription if transcription else None,
-                            audio_attachments,
-                            phone_number
-                        )
-                        
-                        # Move the message to archive folder instead of just marking as read
-                        imap_client.move_message(msg_id, archive_folder)
-                        logger.info(f"Message {msg_id} processed, forwarded, and moved to {archive_folder}")
-                        
-                        # Update statistics
-                        account_stats[account['name']]['messages_processed'] += 1
-                        account_stats[account['name']]['last_activity'] = datetime.now()
-                        
-                        # Mark successful processing
-                        health_check.mark_healthy()
-                        metrics.end_processing(success=True)
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to process message {msg_id}: {e}", exc_info=True)
-                        health_check.mark_failure()
-                        metrics.end_processing(success=False)
-            
-                # Clean old messages once per day for this account
-                if datetime.now() - last_cleanup > timedelta(days=1):
-                    clean_old_messages(imap_client, archive_folder, config['retention_days'])
-                
-                imap_client.disconnect()
-                
-            except KeyboardInterrupt:
-                logger.info("Keyboard interrupt received")
-                shutdown_requested = True
-            except Exception as e:
-                logger.error(f"Error processing account {account['name']}: {e}", exc_info=True)
-                health_check.mark_failure()
-                try:
-                    if 'imap_client' in locals():
-                        imap_client.disconnect()
-                except Exception as disconnect_error:
-                    logger.error(f"Failed to disconnect: {disconnect_error}")
-        
+    while not shutdown_event.is_set():
+        # Process accounts concurrently: each is an independent IMAP/SMTP
+        # session, so per-cycle wall time is max(account) instead of
+        # sum(accounts). The single GPU is serialized by whisper_lock.
+        futures = [
+            executor.submit(_process_account, account, config, whisper,
+                            whisper_lock, imap_pool, account_stats, metrics,
+                            archive_folder, last_cleanup)
+            for account in config['accounts']
+        ]
+        for future in futures:
+            # _process_account handles its own errors; this just joins
+            future.result()
+
+        # One wall-clock read per cycle covers all the checks below
+        now = datetime.now()
+
         # Clean old messages once per day (after all accounts)
-        if datetime.now() - last_cleanup > timedelta(days=1):
-            last_cleanup = datetime.now()
-        
+        if now - last_cleanup > timedelta(days=1):
+            last_cleanup = now
+
         # Log hourly statistics
-        if datetime.now() - last_stats_log > timedelta(hours=1):
+        if now - last_stats_log > timedelta(hours=1):
             logger.info("=== Hourly Statistics ===")
             total_checked = 0
             total_processed = 0
@@ -389,18 +611,53 @@ def process_emails():
             
             # Also log metrics summary
             metrics.metrics.log_summary()
-            last_stats_log = datetime.now()
+            last_stats_log = now
         
-        if not shutdown_requested:
-            logger.debug(f"Sleeping for {config['poll_interval']} seconds...")
-            # Use a loop to check for shutdown during sleep
-            for _ in range(config['poll_interval']):
-                if shutdown_requested:
-                    break
-                time.sleep(1)
-    
+        if not shutdown_event.is_set():
+            remaining = config['poll_interval']
+
+            # Block on IMAP IDLE across every account so new mail anywhere
+            # starts the next cycle immediately instead of after up to
+            # poll_interval. Waits run in _IDLE_SLICE chunks, so one
+            # account's push ends the others' waits within one slice.
+            idle_clients = [
+                client for account in config['accounts']
+                if (client := imap_pool.get(
+                    (account['imap_host'], account['imap_username'], 'fetch')))
+                and client.client is not None
+            ]
+            if idle_clients:
+                wake = threading.Event()
+                # Publish the wake event so the signal handler can end
+                # this wait immediately on SIGTERM/SIGINT
+                _cycle_wake = wake
+                deadline = time.monotonic() + remaining
+                futures = [executor.submit(_idle_account, client, wake, deadline)
+                           for client in idle_clients]
+                # Join every wait before testing: a short-circuiting any()
+                # would leave waits running on pooled sessions the next
+                # cycle is about to use
+                results = [future.result() for future in futures]
+                _cycle_wake = None
+                if any(results):
+                    remaining = 0
+                else:
+                    # Quiet timeout (or only no-IDLE servers) consumed some
+                    # or none of the interval; sleep out the rest below
+                    remaining = max(0, int(deadline - time.monotonic()))
+
+            if remaining > 0:
+                logger.debug(f"Sleeping for {remaining} seconds...")
+                # Wakes immediately when the signal handler sets the event,
+                # with zero interim wakeups while idle
+                shutdown_event.wait(remaining)
+
     logger.info("Email processing service stopped gracefully")
-    
+
+    executor.shutdown(wait=True)
+    for client in imap_pool.values():
+        client.disconnect()
+
     # Log final metrics
     if 'metrics' in locals():
         logger.info("Final processing metrics:")
@@ -1,5 +1,6 @@
 import time
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, Optional
 from dataclasses import dataclass, field
@@ -57,36 +58,54 @@ class MetricsCollector:
         self.metrics = ProcessingMetrics()
         self._processing_start: Optional[float] = None
         self._transcription_start: Optional[float] = None
-    
-    def start_processing(self):
-        """Mark the start of email processing"""
-        self._processing_start = time.time()
-    
-    def end_processing(self, success: bool = True):
-        """Mark the end of email processing"""
-        if self._processing_start:
-            duration = time.time() - self._processing_start
-            self.metrics.total_processing_time += duration
-            if success:
-                self.metrics.emails_processed += 1
-            else:
-                self.metrics.emails_failed += 1
+        # Counters can be updated from the forwarding worker thread as well
+        # as the main processing thread
+        self._lock = threading.Lock()
+
+    def start_processing(self) -> float:
+        """Mark the start of email processing; returns the start timestamp
+        so pipelined callers can carry it across threads"""
+        # Monotonic clock: durations stay correct across NTP steps and
+        # DST wall-clock jumps
+        self._processing_start = time.monotonic()
+        return self._processing_start
+
+    def end_processing(self, success: bool = True, start_time: Optional[float] = None):
+        """Mark the end of email processing.
+
+        Pass start_time when the end happens on a different thread than the
+        matching start_processing call; otherwise the last recorded start
+        is used.
+        """
+        started = start_time if start_time is not None else self._processing_start
+        if started:
+            duration = time.monotonic() - started
+            with self._lock:
+                self.metrics.total_processing_time += duration
+                if success:
+                    self.metrics.emails_processed += 1
+                else:
+                    self.metrics.emails_failed += 1
+        # Clear the pending start unless a different message has started
+        # since (pipelined producer is already timing the next one)
+        if start_time is None or start_time == self._processing_start:
             self._processing_start = None
-    
+
     def start_transcription(self):
         """Mark the start of audio transcription"""
-        self._transcription_start = time.time()
-    
+        self._transcription_start = time.monotonic()
+
     def end_transcription(self, success: bool = True, bytes_processed: int = 0):
         """Mark the end of audio transcription"""
         if self._transcription_start:
-            duration = time.time() - self._transcription_start
-            self.metrics.total_transcription_time += duration
-            if success:
-                self.metrics.audio_files_transcribed += 1
-                self.metrics.bytes_processed += bytes_processed
-            else:
-                self.metrics.transcription_failures += 1
+            duration = time.monotonic() - self._transcription_start
+            with self._lock:
+                self.metrics.total_transcription_time += duration
+                if success:
+                    self.metrics.audio_files_transcribed += 1
+                    self.metrics.bytes_processed += bytes_processed
+                else:
+                    self.metrics.transcription_failures += 1
             self._transcription_start = None
     
     def get_metrics(self) -> ProcessingMetrics:
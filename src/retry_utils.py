@@ -1,4 +1,5 @@
 import time
+import random
 import logging
 from functools import wraps
 from typing import Tuple, Type, Union, Callable
@@ -10,41 +11,49 @@ def retry_with_backoff(
     max_attempts: int = 3,
     initial_delay: float = 1.0,
     backoff_factor: float = 2.0,
+    max_delay: float = 60.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
     log_level: int = logging.WARNING
 ) -> Callable:
     """
     Decorator for retrying functions with exponential backoff.
-    
+
     Args:
         max_attempts: Maximum number of attempts
         initial_delay: Initial delay between retries in seconds
         backoff_factor: Multiplier for delay after each failure
+        max_delay: Cap on the backoff delay in seconds
         exceptions: Tuple of exceptions to catch and retry
         log_level: Logging level for retry messages
     """
     def decorator(func: Callable) -> Callable:
+        func_name = func.__name__
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             delay = initial_delay
             last_exception = None
-            
+
             for attempt in range(max_attempts):
                 try:
                     return func(*args, **kwargs)
                 except exceptions as e:
                     last_exception = e
                     if attempt < max_attempts - 1:
+                        # Jitter spreads simultaneous failures (e.g. every
+                        # account hitting the same network blip) so the
+                        # reconnects don't hammer the server in lockstep
+                        sleep_for = random.uniform(0.5 * delay, 1.5 * delay)
                         logger.log(
                             log_level,
-                            f"{func.__name__} failed (attempt {attempt + 1}/{max_attempts}): {e}. "
-                            f"Retrying in {delay} seconds..."
+                            f"{func_name} failed (attempt {attempt + 1}/{max_attempts}): {e}. "
+                            f"Retrying in {sleep_for:.1f} seconds..."
                         )
-                        time.sleep(delay)
-                        delay *= backoff_factor
+                        time.sleep(sleep_for)
+                        delay = min(max_delay, delay * backoff_factor)
                     else:
                         logger.error(
-                            f"{func.__name__} failed after {max_attempts} attempts: {e}"
+                            f"{func_name} failed after {max_attempts} attempts: {e}"
                         )
             
             # Re-raise the last exception if all attempts failed
@@ -1,70 +1,318 @@
+import io
 import os
+import json
+import wave
+import shutil
+import hashlib
 import logging
 import tempfile
+import threading
 import torch
 import whisper
-from typing import Optional
+from typing import IO, Optional, Union
+
+# Preferred backend: CTranslate2 runs quantized weights (int8_float16)
+# at roughly 2-4x the throughput of the PyTorch implementation. Fall back
+# to openai-whisper when it isn't installed.
+try:
+    from faster_whisper import WhisperModel as _FasterWhisperModel
+except ImportError:
+    _FasterWhisperModel = None
 
 logger = logging.getLogger(__name__)
 
+# Process-global model cache: loading medium takes seconds of disk and
+# CUDA transfer, so re-creating a WhisperTranscriber (e.g. after an error
+# recovery re-init) reuses the already-loaded weights
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
 
 class WhisperTranscriber:
     def __init__(self, model_size: str = "medium", device: Optional[str] = None, language: str = "auto"):
-        self.model_size = model_size
-        self.language = language
-        
         if device is None:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
-            
+
+        # medium on CPU can't keep up with real-time voicemail volume;
+        # base transcribes voicemail-grade audio acceptably at a fraction
+        # of the cost, so downgrade unless explicitly told not to
+        if (self.device == "cpu" and model_size == "medium"
+                and os.environ.get('WHISPER_AUTO_DOWNGRADE', '1') != '0'):
+            logger.warning("No GPU available; downgrading Whisper model from "
+                           "medium to base for CPU-viable transcription "
+                           "(set WHISPER_AUTO_DOWNGRADE=0 to keep medium)")
+            model_size = "base"
+
+        self.model_size = model_size
+        self.language = language
+
         logger.info(f"Initializing Whisper {model_size} model on {self.device}")
         
         if self.device == "cuda":
             logger.info(f"CUDA available: {torch.cuda.is_available()}")
             logger.info(f"CUDA device: {torch.cuda.get_device_name(0)}")
         
+        # How many cores CPU inference may use; default leaves half the
+        # machine for the account/forwarding threads and other workers
+        self._cpu_threads = int(os.environ.get(
+            'WHISPER_CPU_THREADS', max(1, (os.cpu_count() or 2) // 2)))
+
+        if self.device == "cuda":
+            # Input shapes are fixed (30 s log-mel windows), so letting
+            # cuDNN benchmark once and reuse the fastest kernels pays off
+            # on every subsequent call; TF32 matmuls halve bandwidth on
+            # Ampere+ with no effect on transcription quality
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision('high')
+        else:
+            torch.set_num_threads(self._cpu_threads)
+            try:
+                # One sequential model: inter-op parallelism buys nothing
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # Only settable before the first parallel op in the process
+                pass
+
+        # Quantization for the CTranslate2 backend; int8_float16 halves
+        # weight bandwidth on GPU (Tensor Cores, compute capability 7.0+),
+        # plain float16 on older cards, int8 is the sane CPU default
+        if self.device == 'cuda':
+            has_tensor_cores = (torch.cuda.is_available()
+                                and torch.cuda.get_device_capability(0)[0] >= 7)
+            default_compute = 'int8_float16' if has_tensor_cores else 'float16'
+        else:
+            default_compute = 'int8'
+        self.compute_type = os.environ.get('WHISPER_COMPUTE_TYPE', default_compute)
+        self._use_faster = _FasterWhisperModel is not None
+        # Reserved-but-unallocated CUDA memory above this means the torch
+        # allocator is badly fragmented and worth flushing (stock-torch
+        # backend only; CTranslate2 manages its own allocator)
+        self._frag_threshold = 2 * 1024 ** 3
+
+        # Content-addressed transcript cache: a retried or re-delivered
+        # voicemail becomes a file read instead of a GPU decode. Survives
+        # restarts; set VMT_NO_TRANSCRIPT_CACHE=1 to bypass.
+        self.cache_dir = None
+        if os.environ.get('VMT_NO_TRANSCRIPT_CACHE') != '1':
+            cache_dir = os.environ.get(
+                'VMT_TRANSCRIPT_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', 'voicemail-transcriber'))
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                self.cache_dir = cache_dir
+            except OSError as e:
+                logger.warning(f"Transcription cache disabled ({e})")
+
         try:
             # Use the pre-downloaded model if available
             download_root = os.environ.get('WHISPER_CACHE_DIR', None)
-            self.model = whisper.load_model(model_size, device=self.device, download_root=download_root)
-            logger.info(f"Whisper model loaded successfully on {self.device}")
+            cache_key = (model_size, self.device, self._use_faster, self.compute_type)
+            with _MODEL_LOCK:
+                self.model = _MODEL_CACHE.get(cache_key)
+                if self.model is not None:
+                    logger.info(f"Reusing already-loaded {model_size} model on {self.device}")
+                elif self._use_faster:
+                    self.model = _FasterWhisperModel(
+                        model_size, device=self.device,
+                        compute_type=self.compute_type,
+                        cpu_threads=self._cpu_threads if self.device == 'cpu' else 0,
+                        download_root=download_root)
+                    _MODEL_CACHE[cache_key] = self.model
+                    logger.info(f"faster-whisper model loaded successfully on "
+                                f"{self.device} ({self.compute_type})")
+                else:
+                    # eval() is explicit inference intent; whisper has no
+                    # dropout today but this keeps us safe if that changes
+                    self.model = whisper.load_model(model_size, device=self.device, download_root=download_root).eval()
+                    _MODEL_CACHE[cache_key] = self.model
+                    logger.info(f"Whisper model loaded successfully on {self.device}")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
             raise
 
-    def transcribe_audio(self, audio_data: bytes, filename: str) -> str:
+        # Everything here is fixed for the process lifetime; only the
+        # memory counters in get_device_info change between calls
+        self._static_device_info = {
+            "device": self.device,
+            "model_size": self.model_size,
+            "backend": "faster-whisper" if self._use_faster else "whisper",
+        }
+        if self._use_faster:
+            self._static_device_info["compute_type"] = self.compute_type
+        if self.device == "cuda":
+            cuda_available = torch.cuda.is_available()
+            self._static_device_info.update({
+                "cuda_available": cuda_available,
+                "cuda_device_count": torch.cuda.device_count(),
+                "cuda_device_name": torch.cuda.get_device_name(0) if cuda_available else None,
+            })
+
+    def warm_up(self):
+        """Prime the model with one second of silence.
+
+        The first transcription pays for CUDA context setup, cuDNN
+        benchmarking and memory-pool growth; doing it on fake audio at
+        startup keeps that cost out of the first real voicemail.
+        """
+        sample_rate = 16000
+        with io.BytesIO() as buf:
+            with wave.open(buf, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(sample_rate)
+                wav.writeframes(b'\x00\x00' * sample_rate)
+            silence = buf.getvalue()
+        try:
+            # Skip the transcript cache: the same silence hashes the same
+            # every start, and a cache hit would return before the model
+            # (and CUDA context) is ever touched — defeating the warmup
+            self.transcribe_audio(silence, 'warmup.wav', _skip_cache=True)
+            logger.info("Whisper model warmed up")
+        except Exception as e:
+            # Warmup is best-effort; real transcriptions just pay the
+            # first-call cost instead
+            logger.warning(f"Whisper warmup failed: {e}")
+
+    def _cache_path(self, audio_data) -> str:
+        """Cache file path for this audio content, model and language"""
+        digest = hashlib.sha256()
+        if hasattr(audio_data, 'read'):
+            audio_data.seek(0)
+            for chunk in iter(lambda: audio_data.read(1 << 16), b''):
+                digest.update(chunk)
+            audio_data.seek(0)
+        else:
+            digest.update(audio_data)
+        return os.path.join(
+            self.cache_dir,
+            f"{self.model_size}_{self.language}_{digest.hexdigest()}.json")
+
+    def _cache_store(self, cache_path: str, transcription: str):
+        """Write a transcript cache entry atomically; failures are non-fatal"""
+        try:
+            # Temp file + rename so a reader never sees half a JSON
+            tmp_cache = cache_path + '.tmp'
+            with open(tmp_cache, 'w') as f:
+                json.dump({'text': transcription}, f)
+            os.replace(tmp_cache, cache_path)
+        except OSError as e:
+            logger.debug(f"Could not write transcription cache: {e}")
+
+    def transcribe_audio(self, audio_data: Union[bytes, memoryview, IO[bytes]], filename: str,
+                         _skip_cache: bool = False) -> str:
+        cache_path = None
+        if self.cache_dir and not _skip_cache:
+            cache_path = self._cache_path(audio_data)
+            try:
+                with open(cache_path) as f:
+                    cached = json.load(f)['text']
+                logger.info(f"Transcription cache hit for {filename}")
+                return cached
+            except FileNotFoundError:
+                pass
+            except (ValueError, KeyError, OSError) as e:
+                # Corrupt entry is just a miss; it gets rewritten below
+                logger.warning(f"Ignoring bad transcription cache entry: {e}")
+
         tmp_file_path = None
         try:
+            if self._use_faster:
+                # faster-whisper accepts a binary file-like directly and
+                # decodes it in-process with PyAV — no temp file on disk
+                # and no ffmpeg fork+exec per call
+                if hasattr(audio_data, 'read'):
+                    audio_data.seek(0)
+                    source = audio_data
+                else:
+                    source = io.BytesIO(audio_data)
+
+                logger.info(f"Transcribing audio file: {filename}")
+
+                # Greedy decode (beam_size=1) is plenty for voicemail-grade
+                # audio and the cheapest compute rung
+                # vad_filter trims the leading/trailing carrier silence
+                # voicemail systems record, so the decoder only sees speech
+                # condition_on_previous_text off: voicemail clips are
+                # independent, so carrying context across 30 s windows only
+                # risks repetition loops and serializes window decodes
+                segments, _info = self.model.transcribe(
+                    source,
+                    beam_size=1,
+                    vad_filter=True,
+                    condition_on_previous_text=False,
+                    language=None if self.language == "auto" else self.language,
+                    task="transcribe"
+                )
+                transcription = "".join(segment.text for segment in segments).strip()
+                logger.info(f"Transcription completed for {filename}")
+
+                if cache_path:
+                    self._cache_store(cache_path, transcription)
+                return transcription
+
+            # Stock whisper decodes through an ffmpeg subprocess, which
+            # needs a real path on disk
             # Create temporary file with secure permissions
             fd, tmp_file_path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
+            fd_closed = False
             try:
                 # Set secure permissions (only owner can read/write)
                 os.chmod(tmp_file_path, 0o600)
-                # Write audio data
-                with os.fdopen(fd, 'wb') as tmp_file:
-                    tmp_file.write(audio_data)
+                # Write audio data; spooled attachments are copied in chunks
+                # rather than read into one bytes object, while plain bytes
+                # go straight through the fd — no BufferedWriter (and its
+                # 8 KiB buffer) for a single write
+                if hasattr(audio_data, 'read'):
+                    audio_data.seek(0)
+                    with os.fdopen(fd, 'wb') as tmp_file:
+                        fd_closed = True  # fdopen owns the fd now
+                        shutil.copyfileobj(audio_data, tmp_file)
+                else:
+                    os.write(fd, audio_data)
+                    os.close(fd)
+                    fd_closed = True
             except Exception:
-                os.close(fd)
+                if not fd_closed:
+                    os.close(fd)
                 raise
             
             logger.info(f"Transcribing audio file: {filename}")
-            
+
             # Transcribe audio
             transcribe_kwargs = {
                 "fp16": self.device == "cuda",
                 "task": "transcribe"
             }
-            
+
             # Only set language if not auto-detect
             if self.language != "auto":
                 transcribe_kwargs["language"] = self.language
-            
-            result = self.model.transcribe(tmp_file_path, **transcribe_kwargs)
-            
+
+            # inference_mode skips autograd bookkeeping entirely (cheaper
+            # than no_grad) — we never backprop through this model
+            with torch.inference_mode():
+                result = self.model.transcribe(tmp_file_path, **transcribe_kwargs)
+
             transcription = result["text"].strip()
             logger.info(f"Transcription completed for {filename}")
-            
+
+            if self.device == "cuda":
+                # Hand fragmented allocator blocks back to the driver, but
+                # only under real pressure — variable-length clips grow the
+                # reserved pool over long runs, while an unconditional
+                # flush would pay the cudaFree cost on every message
+                fragmented = torch.cuda.memory_reserved(0) - torch.cuda.memory_allocated(0)
+                if fragmented > self._frag_threshold:
+                    torch.cuda.empty_cache()
+                    logger.debug(f"Released {fragmented / 1024 / 1024:.0f}MB of "
+                                 f"fragmented CUDA cache; reserved now "
+                                 f"{torch.cuda.memory_reserved(0) / 1024 / 1024:.0f}MB")
+
+            if cache_path:
+                self._cache_store(cache_path, transcription)
+
             return transcription
             
         except Exception as e:
@@ -79,18 +327,11 @@ class WhisperTranscriber:
                     logger.warning(f"Failed to delete temp file {tmp_file_path}: {e}")
 
     def get_device_info(self) -> dict:
-        info = {
-            "device": self.device,
-            "model_size": self.model_size
-        }
-        
-        if self.device == "cuda":
-            info.update({
-                "cuda_available": torch.cuda.is_available(),
-                "cuda_device_count": torch.cuda.device_count(),
-                "cuda_device_name": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
-                "cuda_memory_allocated": torch.cuda.memory_allocated(0) if torch.cuda.is_available() else None,
-                "cuda_memory_reserved": torch.cuda.memory_reserved(0) if torch.cuda.is_available() else None
-            })
-        
+        info = dict(self._static_device_info)
+
+        if self.device == "cuda" and info.get("cuda_available"):
+            # Only the memory counters are live; the rest was cached at init
+            info["cuda_memory_allocated"] = torch.cuda.memory_allocated(0)
+            info["cuda_memory_reserved"] = torch.cuda.memory_reserved(0)
+
         return info
\ No newline at end of file